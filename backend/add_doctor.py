@@ -2,16 +2,34 @@
 Doktor Ekleme Script'i
 ======================
 Bu script doktorları manuel olarak veritabanına eklemek için kullanılır.
+
+Kullanım:
+    python add_doctor.py                          # tek doktor (etkileşimli)
+    python add_doctor.py list                     # kayıtlı doktorlar
+    python add_doctor.py import doktorlar.csv     # toplu içe aktarma (.csv / .jsonl)
+    python add_doctor.py import doktorlar.jsonl hatalar.csv
+
+Toplu içe aktarma sütunları: email, full_name, password, department, phone,
+age, gender. Hatalı satırlar satır numarası ve nedeniyle raporlanır.
 """
 
+import asyncio
+import csv
+import multiprocessing
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from getpass import getpass
+from pathlib import Path
 
-from sqlmodel import Session, select
+from sqlmodel import select
 
 from app.auth import hash_password
-from app.database import engine
+from app.core.password_pool import password_pool
+from app.core.redis import get_redis
+from app.database import async_session
 from app.models import User, UserRole
+from app.services import doctor_import, doctor_roster
 
 
 def add_doctor():
@@ -57,41 +75,52 @@ def add_doctor():
         sys.exit(0)
 
     try:
-        with Session(engine) as session:
-            # Email kontrolü
-            existing_user = session.exec(
-                select(User).where(User.email == email)
-            ).first()
-
-            if existing_user:
-                print(f"❌ Hata: {email} adresi zaten kayıtlı!")
-                sys.exit(1)
-
-            # Yeni doktor oluştur
-            new_doctor = User(
-                email=email,
-                password_hash=hash_password(password),
-                role=UserRole.doctor,
-                full_name=full_name
-            )
-
-            session.add(new_doctor)
-            session.commit()
-            session.refresh(new_doctor)
-
-            print()
-            print("✅ Başarılı!")
-            print(f"   Doktor ID: {new_doctor.id}")
-            print(f"   Email: {new_doctor.email}")
-            print(f"   Ad Soyad: {new_doctor.full_name}")
-            print()
-            print("Bu bilgilerle sisteme giriş yapabilirsiniz.")
-
+        asyncio.run(_insert_doctor(full_name, email, password))
     except Exception as e:
         print(f"❌ Hata oluştu: {str(e)}")
         sys.exit(1)
 
 
+async def _insert_doctor(full_name: str, email: str, password: str):
+    """Doktoru veritabanına kaydet"""
+    async with async_session() as session:
+        # Email kontrolü
+        existing_user = (
+            await session.exec(select(User).where(User.email == email))
+        ).first()
+
+        if existing_user:
+            print(f"❌ Hata: {email} adresi zaten kayıtlı!")
+            sys.exit(1)
+
+        # Yeni doktor oluştur (şifre, havuzdaki ayrı bir süreçte hash'lenir)
+        password_hash = await password_pool.run(hash_password, password, admit=False)
+        password_pool.shutdown()
+        new_doctor = User(
+            email=email,
+            password_hash=password_hash,
+            role=UserRole.doctor,
+            full_name=full_name
+        )
+
+        session.add(new_doctor)
+        await session.commit()
+        await session.refresh(new_doctor)
+
+        # Tüm API worker'larının doktor listesini yenilemesini sağla
+        redis = get_redis()
+        await doctor_roster.bump_version(redis)
+        await redis.aclose()
+
+        print()
+        print("✅ Başarılı!")
+        print(f"   Doktor ID: {new_doctor.id}")
+        print(f"   Email: {new_doctor.email}")
+        print(f"   Ad Soyad: {new_doctor.full_name}")
+        print()
+        print("Bu bilgilerle sisteme giriş yapabilirsiniz.")
+
+
 def list_doctors():
     """Mevcut doktorları listele"""
     print("=" * 50)
@@ -100,29 +129,83 @@ def list_doctors():
     print()
 
     try:
-        with Session(engine) as session:
-            doctors = session.exec(
-                select(User).where(User.role == UserRole.doctor)
-            ).all()
-
-            if not doctors:
-                print("Henüz kayıtlı doktor yok.")
-            else:
-                for idx, doctor in enumerate(doctors, 1):
-                    print(f"{idx}. {doctor.full_name}")
-                    print(f"   Email: {doctor.email}")
-                    print(f"   ID: {doctor.id}")
-                    print()
+        asyncio.run(_print_doctors())
+    except Exception as e:
+        print(f"❌ Hata oluştu: {str(e)}")
+        sys.exit(1)
+
 
+async def _print_doctors():
+    """Kayıtlı doktorları yazdır"""
+    async with async_session() as session:
+        doctors = (
+            await session.exec(select(User).where(User.role == UserRole.doctor))
+        ).all()
+
+        if not doctors:
+            print("Henüz kayıtlı doktor yok.")
+        else:
+            for idx, doctor in enumerate(doctors, 1):
+                print(f"{idx}. {doctor.full_name}")
+                print(f"   Email: {doctor.email}")
+                print(f"   ID: {doctor.id}")
+                print()
+
+
+def import_doctors(path: str, report_path: str | None = None):
+    """CSV/JSONL dosyasından doktorları toplu ekle"""
+    print("=" * 50)
+    print("TOPLU DOKTOR İÇE AKTARMA")
+    print("=" * 50)
+    print()
+
+    try:
+        rows = doctor_import.read_rows(Path(path))
+        report = asyncio.run(_import_doctors(rows))
     except Exception as e:
         print(f"❌ Hata oluştu: {str(e)}")
         sys.exit(1)
 
+    print(f"✅ Eklenen doktor: {report.inserted} / {len(rows)}")
+    if report.errors:
+        print(f"❌ Hatalı satır: {len(report.errors)}")
+        for error in report.errors:
+            print(f"   Satır {error.line} ({error.email or '-'}): {error.message}")
+        if report_path:
+            with open(report_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["line", "email", "error"])
+                for error in report.errors:
+                    writer.writerow([error.line, error.email or "", error.message])
+            print(f"   Hata raporu: {report_path}")
+
+
+async def _import_doctors(rows):
+    """Satırları tek transaction'da kaydet"""
+    # Şifreler API'nin küçük havuzu yerine tüm çekirdeklere yayılır
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        async with async_session() as session:
+            report = await doctor_import.import_doctors(session, rows, executor)
+
+    if report.inserted:
+        # Tüm API worker'larının doktor listesini yenilemesini sağla
+        redis = get_redis()
+        await doctor_roster.bump_version(redis)
+        await redis.aclose()
+    return report
+
 
 def main():
     """Ana fonksiyon"""
     if len(sys.argv) > 1 and sys.argv[1] == "list":
         list_doctors()
+    elif len(sys.argv) > 1 and sys.argv[1] == "import":
+        if len(sys.argv) < 3:
+            print("Kullanım: python add_doctor.py import <dosya.csv|dosya.jsonl> [hata_raporu.csv]")
+            sys.exit(1)
+        import_doctors(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
     else:
         add_doctor()
 
@@ -1,10 +1,20 @@
-from datetime import timedelta
+from datetime import datetime
 
-import redis
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from redis.asyncio import Redis
+from sqlalchemy import DateTime, Integer, String, insert, literal, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.auth import get_current_user
+from app.auth import get_current_principal
+from app.core.fields import USER_FIELDS, parse_fields, user_columns
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.rate_limit import RateLimiter, rate_limit
+from app.core.redis import get_redis
+from app.core.replicas import get_read_session, mark_write
+from app.core.rows import APPOINTMENT_COLUMNS, appointments_with_users, json_response
 from app.database import get_session
 from app.models import (
     Appointment,
@@ -12,19 +22,58 @@ from app.models import (
     AppointmentRead,
     AppointmentStatus,
     User,
+    UserRead,
     UserRole,
+    naive_utc,
 )
+from app.services import availability
 
-router = APIRouter(prefix="/appointments", tags=["appointments"])
+router = APIRouter(
+    prefix="/appointments",
+    tags=["appointments"],
+    dependencies=[Depends(RateLimiter(rate_limit("appointments", "60/60")))],
+)
+
+EXCLUSION_VIOLATION = "23P01"
+MY_APPOINTMENTS_PAGE = 50
 
-redis_client = redis.Redis(host="appointment_redis", port=6379, db=0, decode_responses=True)
+
+def _booking_statement(patient_id: int, appointment_data: AppointmentCreate):
+    """
+    The whole booking as one statement.
+    The doctor check is folded into INSERT ... SELECT and overlaps are
+    rejected by the appointments_no_overlap constraint, which holds across
+    every worker and pod without an application-side lock. The inserted row
+    is joined back to the doctor, whose columns come back as doctor__<field>.
+    """
+    booked = (
+        insert(Appointment)
+        .from_select(
+            ["doctor_id", "patient_id", "start_time", "status", "appointment_type"],
+            select(
+                User.id,
+                literal(patient_id, Integer),
+                literal(appointment_data.start_time, DateTime),
+                literal(AppointmentStatus.active, Appointment.__table__.c.status.type),
+                literal("Consultation", String),
+            ).where(User.id == appointment_data.doctor_id, User.role == UserRole.doctor),
+        )
+        .returning(*Appointment.__mapper__.columns)
+        .cte("booked")
+    )
+    doctor_columns = [
+        column.label(f"doctor__{name}")
+        for name, column in zip(USER_FIELDS, user_columns(), strict=True)
+    ]
+    return select(booked, *doctor_columns).join_from(booked, User, User.id == booked.c.doctor_id)
 
 
 @router.post("", response_model=AppointmentRead, status_code=status.HTTP_201_CREATED)
 async def create_appointment(
     appointment_data: AppointmentCreate,
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    current_user: UserRead = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_session),
+    async_redis: Redis = Depends(get_redis),
 ):
     """
     Create appointment (Only users with patient role)
@@ -36,61 +85,124 @@ async def create_appointment(
             detail="Only patients can create appointments",
         )
 
-    lock_key = f"lock:appointment:{appointment_data.doctor_id}:{appointment_data.start_time}"
-    is_locked = redis_client.set(lock_key, "locked", ex=10, nx=True)
-    if not is_locked:
-        raise HTTPException(
-            status_code=409,
-            detail="This time slot is currently being processed by another user. Please try again.",
-        )
+    booking = _booking_statement(current_user.id, appointment_data)
+    try:
+        row = (await session.exec(booking)).mappings().one_or_none()
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        if getattr(e.orig, "sqlstate", None) == EXCLUSION_VIOLATION:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This doctor has another appointment at the selected time",
+            ) from e
+        raise
 
-    doctor = session.get(User, appointment_data.doctor_id)
-    if not doctor or doctor.role != UserRole.doctor:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Doctor not found",
         )
 
-    appointment_end_time = appointment_data.start_time + timedelta(hours=1)
-    conflicting_appointment = session.exec(
-        select(Appointment).where(
-            Appointment.doctor_id == appointment_data.doctor_id,
-            Appointment.status == AppointmentStatus.active,
-            Appointment.start_time < appointment_end_time,
-            Appointment.start_time >= appointment_data.start_time - timedelta(hours=1),
-        )
-    ).first()
-    if conflicting_appointment:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="This doctor has another appointment at the selected time",
-        )
+    appointment = {column.name: row[column.name] for column in Appointment.__mapper__.columns}
+    doctor = {name: row[f"doctor__{name}"] for name in USER_FIELDS}
+    new_appointment = Appointment(**appointment)
+    await availability.record_booking(async_redis, new_appointment)
+    await mark_write(async_redis, current_user.id, new_appointment.doctor_id)
 
-    new_appointment = Appointment(
-        doctor_id=appointment_data.doctor_id,
-        patient_id=current_user.id,
-        start_time=appointment_data.start_time,
-        status=AppointmentStatus.active,
-    )
-    session.add(new_appointment)
-    session.commit()
-    session.refresh(new_appointment)
+    return AppointmentRead.model_validate({**appointment, "doctor": doctor, "patient": current_user})
+
+
+def _my_appointments_statement(
+    current_user: UserRead,
+    from_time: datetime | None,
+    to_time: datetime | None,
+    appointment_status: AppointmentStatus | None,
+    after: list | None,
+):
+    """Filtered, ordered appointment list (also checked by the query-plan tests)"""
+    statement = select(*APPOINTMENT_COLUMNS)
+    if current_user.role == UserRole.doctor:
+        statement = statement.where(Appointment.doctor_id == current_user.id)
+    else:
+        statement = statement.where(Appointment.patient_id == current_user.id)
 
-    return new_appointment
+    if from_time is not None:
+        statement = statement.where(Appointment.start_time >= naive_utc(from_time))
+    if to_time is not None:
+        statement = statement.where(Appointment.start_time < naive_utc(to_time))
+    if appointment_status is not None:
+        statement = statement.where(Appointment.status == appointment_status)
+    if after is not None:
+        after_time, after_id = after
+        statement = statement.where(
+            tuple_(Appointment.start_time, Appointment.id) > tuple_(after_time, after_id)
+        )
+    return statement.order_by(Appointment.start_time, Appointment.id)
 
 
 @router.get("/my", response_model=list[AppointmentRead])
 async def get_my_appointments(
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    response: Response,
+    current_user: UserRead = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
+    from_time: datetime | None = Query(None, alias="from"),
+    to_time: datetime | None = Query(None, alias="to"),
+    appointment_status: AppointmentStatus | None = Query(None, alias="status"),
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=200),
+    fields: tuple[str, ...] | None = Depends(parse_fields),
 ):
-    """List user's appointments based on their role."""
-    if current_user.role == UserRole.doctor:
-        return session.exec(
-            select(Appointment).where(Appointment.doctor_id == current_user.id)
-        ).all()
+    """
+    List user's appointments based on their role.
+    Ordered by start time. Paging is opt-in: with limit= or cursor= pages of
+    limit (default MY_APPOINTMENTS_PAGE) are returned and the next page
+    token is in X-Next-Cursor; without them the whole list is returned.
+    fields= trims the nested doctor and patient.
+    """
+    after = decode_cursor(cursor, datetime, int) if cursor is not None else None
+    statement = _my_appointments_statement(
+        current_user, from_time, to_time, appointment_status, after
+    )
+    if limit is None and cursor is None:
+        rows = (await session.exec(statement)).all()
+    else:
+        limit = limit or MY_APPOINTMENTS_PAGE
+        # One extra row tells whether another page exists
+        rows = (await session.exec(statement.limit(limit + 1))).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.start_time, last.id)
+
+    appointments = await appointments_with_users(session, rows, fields or USER_FIELDS)
+    return json_response(appointments, response)
+
+
+@router.patch("/{appointment_id}/cancel", response_model=AppointmentRead)
+async def cancel_appointment(
+    appointment_id: int,
+    current_user: UserRead = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_session),
+    async_redis: Redis = Depends(get_redis),
+):
+    """Cancel an appointment (its patient or doctor only)."""
+    appointment = await session.get(
+        Appointment,
+        appointment_id,
+        options=[selectinload(Appointment.doctor), selectinload(Appointment.patient)],
+    )
+    if not appointment or current_user.id not in (appointment.doctor_id, appointment.patient_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appointment not found",
+        )
 
-    return session.exec(
-        select(Appointment).where(Appointment.patient_id == current_user.id)
-    ).all()
+    if appointment.status != AppointmentStatus.cancelled:
+        appointment.status = AppointmentStatus.cancelled
+        session.add(appointment)
+        await session.commit()
+        await availability.record_cancellation(async_redis, appointment)
+        await mark_write(async_redis, appointment.patient_id, appointment.doctor_id)
 
+    return appointment
@@ -1,23 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from redis.asyncio import Redis
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth import (
     authenticate_user,
     create_access_token,
-    get_current_user,
-    hash_password,
+    get_current_principal,
+    hash_password_async,
 )
+from app.core.rate_limit import RateLimiter, rate_limit
+from app.core.redis import get_redis
 from app.database import get_session
 from app.models import Token, User, UserCreate, UserLogin, UserRead, UserRole
+from app.services import triage
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(
+    prefix="/auth",
+    tags=["auth"],
+    dependencies=[Depends(RateLimiter(rate_limit("auth", "20/60")))],
+)
 
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, session: Session = Depends(get_session)):
+async def register(
+    user_data: UserCreate,
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+):
     """User registration endpoint."""
     try:
-        existing_user = session.exec(select(User).where(User.email == user_data.email)).first()
+        existing_user = (
+            await session.exec(select(User).where(User.email == user_data.email))
+        ).first()
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -25,24 +40,25 @@ async def register(user_data: UserCreate, session: Session = Depends(get_session
             )
         new_user = User(
             email=user_data.email,
-            password_hash=hash_password(user_data.password),
+            password_hash=await hash_password_async(user_data.password),
             role=UserRole.patient,
             full_name=user_data.full_name,
         )
         session.add(new_user)
-        session.commit()
-        session.refresh(new_user)
+        await session.commit()
+        await session.refresh(new_user)
+        await triage.update_patient(redis, new_user)
         return new_user
     except HTTPException:
         raise
     except ValueError as e:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         ) from e
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred during registration: {str(e)}",
@@ -50,9 +66,9 @@ async def register(user_data: UserCreate, session: Session = Depends(get_session
 
 
 @router.post("/login", response_model=Token)
-async def login(login_data: UserLogin, session: Session = Depends(get_session)):
+async def login(login_data: UserLogin, session: AsyncSession = Depends(get_session)):
     """User login - returns JWT token."""
-    user = authenticate_user(login_data.email, login_data.password, session)
+    user = await authenticate_user(login_data.email, login_data.password, session)
 
     if not user:
         raise HTTPException(
@@ -66,7 +82,7 @@ async def login(login_data: UserLogin, session: Session = Depends(get_session)):
 
 
 @router.get("/me", response_model=UserRead)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: UserRead = Depends(get_current_principal)):
     """Get current authenticated user."""
     return current_user
 
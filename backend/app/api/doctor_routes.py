@@ -1,15 +1,191 @@
+import json
+from datetime import UTC, date, datetime
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from redis.asyncio import Redis
+from sqlalchemy import func, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.fields import USER_FIELDS, parse_fields, user_columns
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.rate_limit import RateLimiter, rate_limit
+from app.core.redis import get_redis
+from app.core.replicas import LazyReadSession, get_lazy_read_session
+from app.core.rows import as_dicts, json_response
 from app.database import get_session
-from app.models import User, UserRead, UserRole
+from app.models import (
+    APPOINTMENT_DURATION,
+    DoctorAvailability,
+    FirstAvailableDoctor,
+    User,
+    UserRead,
+    UserRole,
+)
+from app.services import availability, doctor_roster
 
-router = APIRouter(prefix="/doctors", tags=["doctors"])
+router = APIRouter(
+    prefix="/doctors",
+    tags=["doctors"],
+    dependencies=[Depends(RateLimiter(rate_limit("doctors", "120/60")))],
+)
+
+DEPARTMENT_COUNTS_HEADER = "X-Department-Counts"
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _department_counts_header(counts: dict[str, int]) -> str:
+    # ASCII-escaped JSON: header values must be latin-1
+    return json.dumps(dict(sorted(counts.items())), separators=(",", ":"))
+
+
+def _name_filter(q: str):
+    # Escape LIKE wildcards; the trigram index serves ILIKE '%q%'
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return User.full_name.ilike(f"%{escaped}%", escape="\\")
 
 
 @router.get("", response_model=list[UserRead])
-async def get_doctors(session: Session = Depends(get_session)):
-    """List only users with doctor role."""
-    return session.exec(select(User).where(User.role == UserRole.doctor)).all()
+async def get_doctors(
+    response: Response,
+    department: str | None = None,
+    q: str | None = Query(None, min_length=1, max_length=100),
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    if_none_match: str | None = Header(None),
+    fields: tuple[str, ...] | None = Depends(parse_fields),
+    read_session: LazyReadSession = Depends(get_lazy_read_session),
+    primary: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+):
+    """
+    List only users with doctor role.
+    Without filters the full roster is served from the per-worker cache with
+    a strong ETag. With department/q the search is paged by (full_name, id).
+    X-Department-Counts carries doctors per department (honouring q).
+    fields= trims each doctor to the listed fields.
+    """
+    if department is None and q is None and cursor is None:
+        # From the primary: a snapshot is cached until the next version bump
+        roster = await doctor_roster.get_roster(primary, redis)
+        body, etag = (roster.body, roster.etag) if fields is None else roster.projected(fields)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            DEPARTMENT_COUNTS_HEADER: _department_counts_header(roster.department_counts),
+        }
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    # Only the search reads from a replica; the roster path never opens it
+    session = await read_session()
+    conditions = [User.role == UserRole.doctor]
+    if q is not None:
+        conditions.append(_name_filter(q))
+
+    counts_statement = (
+        select(User.department, func.count()).where(*conditions).group_by(User.department)
+    )
+    counts = {dept or "": count for dept, count in (await session.exec(counts_statement)).all()}
+    response.headers[DEPARTMENT_COUNTS_HEADER] = _department_counts_header(counts)
+
+    fields = fields or USER_FIELDS
+    # The requested columns, then the keyset
+    statement = select(*user_columns(tuple(dict.fromkeys((*fields, "full_name")))))
+    statement = statement.where(*conditions)
+    if department is not None:
+        statement = statement.where(User.department == department)
+    if cursor is not None:
+        after_name, after_id = decode_cursor(cursor, str, int)
+        statement = statement.where(tuple_(User.full_name, User.id) > tuple_(after_name, after_id))
+    statement = statement.order_by(User.full_name, User.id).limit(limit + 1)
+    doctors = (await session.exec(statement)).all()
+
+    if len(doctors) > limit:
+        doctors = doctors[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(doctors[-1].full_name, doctors[-1].id)
+
+    return json_response(as_dicts(doctors, fields), response)
+
+
+def _requested_days(from_date: date | None, to_date: date | None) -> list[date]:
+    today = datetime.now(UTC).date()
+    start = from_date or today
+    end = to_date or start + availability.DEFAULT_RANGE
+    try:
+        return availability.date_range(max(start, today), end)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+
+@router.get("/availability", response_model=list[FirstAvailableDoctor])
+async def get_first_available(
+    department: str,
+    from_date: date | None = Query(None, alias="from"),
+    to_date: date | None = Query(None, alias="to"),
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+):
+    """
+    Doctors of a department ordered by their earliest free slot
+    Doctors without a free slot in the range are omitted.
+    """
+    days = _requested_days(from_date, to_date)
+    doctors = (
+        await session.exec(
+            select(User).where(User.role == UserRole.doctor, User.department == department)
+        )
+    ).all()
+    if not doctors:
+        return []
+
+    busy = await availability.get_busy_intervals(
+        session, redis, [doctor.id for doctor in doctors], days
+    )
+    now = datetime.now(UTC).replace(tzinfo=None)
+    first_available = []
+    for doctor in doctors:
+        for day in days:
+            slots = availability.free_slots(day, busy[(doctor.id, day)], now)
+            if slots:
+                first_available.append(FirstAvailableDoctor(doctor=doctor, first_slot=slots[0]))
+                break
+
+    return sorted(first_available, key=lambda item: item.first_slot)
+
+
+@router.get("/{doctor_id}/availability", response_model=DoctorAvailability)
+async def get_doctor_availability(
+    doctor_id: int,
+    from_date: date | None = Query(None, alias="from"),
+    to_date: date | None = Query(None, alias="to"),
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+):
+    """Free slots of a doctor between two dates (inclusive, UTC)."""
+    days = _requested_days(from_date, to_date)
+    doctor = await session.get(User, doctor_id)
+    if not doctor or doctor.role != UserRole.doctor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found",
+        )
+
+    busy = await availability.get_busy_intervals(session, redis, [doctor_id], days)
+    now = datetime.now(UTC).replace(tzinfo=None)
+    slots = []
+    for day in days:
+        slots.extend(availability.free_slots(day, busy[(doctor_id, day)], now))
 
+    return DoctorAvailability(
+        doctor_id=doctor_id,
+        duration_minutes=int(APPOINTMENT_DURATION.total_seconds() // 60),
+        slots=slots,
+    )
@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.health import health_monitor
 
 router = APIRouter(tags=["health"])
 
@@ -8,3 +11,15 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "ok", "message": "Hastane Randevu Sistemi çalışıyor"}
 
+
+@router.get("/health/live")
+async def liveness():
+    """Liveness: the worker's event loop is serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """Readiness from the cached dependency probes; 503 when a critical one fails."""
+    ready, body = health_monitor.report()
+    return JSONResponse(status_code=200 if ready else 503, content=body)
@@ -1,38 +1,110 @@
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
+from collections.abc import AsyncGenerator
 
-from app.auth import get_current_user
-from app.database import get_session
+import orjson
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth import get_current_principal
+from app.core.fields import USER_FIELDS, parse_fields, user_columns
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.rate_limit import RateLimiter, rate_limit
+from app.core.redis import get_redis
+from app.core.replicas import get_read_session
+from app.core.rows import as_dicts, json_response, users_by_id
 from app.models import User, UserRead, UserRole
+from app.services import triage
+
+router = APIRouter(
+    prefix="/patients",
+    tags=["patients"],
+    dependencies=[Depends(RateLimiter(rate_limit("patients", "120/60")))],
+)
+
+
+WAITING_LIST_PAGE = 100
+STREAM_BATCH_SIZE = 500
+
 
-router = APIRouter(prefix="/patients", tags=["patients"])
+async def _stream_patients(
+    after_id: int | None, bind: AsyncEngine, fields: tuple[str, ...]
+) -> AsyncGenerator[bytes, None]:
+    """
+    NDJSON lines from a server-side cursor
+    Rows are plain tuples (no ORM identity map), so memory stays flat.
+    The dependency session is closed before streaming starts; open our own
+    on the engine it was routed to.
+    """
+    statement = select(*user_columns(fields)).where(User.role == UserRole.patient)
+    if after_id is not None:
+        statement = statement.where(User.id > after_id)
+    statement = statement.order_by(User.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+        result = await session.stream(statement)
+        async for row in result:
+            yield orjson.dumps(dict(zip(fields, row, strict=True))) + b"\n"
 
 
 @router.get("/waiting-list", response_model=list[UserRead])
 async def get_waiting_list(
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    response: Response,
+    current_user: UserRead = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=500),
+    stream: bool = False,
+    fields: tuple[str, ...] | None = Depends(parse_fields),
 ):
-    """Get list of all patients for waiting list."""
-    return session.exec(
-        select(User).where(User.role == UserRole.patient)
-    ).all()
+    """
+    Get list of all patients for waiting list.
+    Paging by id is opt-in: with limit= or cursor= pages of limit (default
+    WAITING_LIST_PAGE) are returned and the next page token is in
+    X-Next-Cursor; without them the whole list is returned. stream=true
+    returns every remaining patient as NDJSON instead. fields= trims each
+    patient.
+    """
+    after_id = decode_cursor(cursor, int)[0] if cursor is not None else None
+    fields = fields or USER_FIELDS
+    if stream:
+        return StreamingResponse(
+            _stream_patients(after_id, session.bind, fields), media_type="application/x-ndjson"
+        )
+
+    statement = select(*user_columns(fields)).where(User.role == UserRole.patient)
+    if after_id is not None:
+        statement = statement.where(User.id > after_id)
+    statement = statement.order_by(User.id)
+    if limit is None and cursor is None:
+        patients = (await session.exec(statement)).all()
+    else:
+        limit = limit or WAITING_LIST_PAGE
+        patients = (await session.exec(statement.limit(limit + 1))).all()
+        if len(patients) > limit:
+            patients = patients[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(patients[-1].id)
+
+    return json_response(as_dicts(patients, fields), response)
 
 
 @router.get("/priority", response_model=list[UserRead])
 async def get_priority_patients(
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    response: Response,
+    current_user: UserRead = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
+    redis: Redis = Depends(get_redis),
+    limit: int = Query(20, ge=1, le=100),
 ):
-    """Get priority patients (those with urgent conditions)."""
-    # For now, return patients with specific medical histories
-    urgent_conditions = ["Chest Pain", "Severe Headache", "Fever"]
-    patients = session.exec(select(User).where(User.role == UserRole.patient)).all()
-
-    priority_patients = [
-        p for p in patients
-        if p.medical_history and any(cond in p.medical_history for cond in urgent_conditions)
-    ]
+    """Get priority patients, ordered by age and health status."""
+    patient_ids = await triage.top_patient_ids(session, redis, limit)
+    if not patient_ids:
+        return []
 
-    return priority_patients
+    by_id = await users_by_id(session, set(patient_ids))
+    return json_response(
+        [by_id[patient_id] for patient_id in patient_ids if patient_id in by_id], response
+    )
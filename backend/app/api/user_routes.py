@@ -1,13 +1,23 @@
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from sqlmodel import Session
+from redis.asyncio import Redis
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.auth import get_current_user
+from app.auth import get_current_principal, get_current_user
+from app.core.principal_cache import principal_cache
+from app.core.rate_limit import RateLimiter, rate_limit
+from app.core.redis import get_redis
+from app.core.replicas import mark_write
 from app.database import get_session
-from app.models import User, UserRead
+from app.models import User, UserRead, UserRole
+from app.services import doctor_roster, triage
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(
+    prefix="/users",
+    tags=["users"],
+    dependencies=[Depends(RateLimiter(rate_limit("users", "30/60")))],
+)
 
 
 class UserProfileUpdate(BaseModel):
@@ -24,7 +34,8 @@ class UserProfileUpdate(BaseModel):
 async def update_profile(
     profile_data: UserProfileUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
 ):
     """
     Update current user's profile information
@@ -44,15 +55,20 @@ async def update_profile(
         current_user.allergies = profile_data.allergies
 
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await session.commit()
+    await session.refresh(current_user)
+    await principal_cache.invalidate(redis, current_user.id)
+    await mark_write(redis, current_user.id)
+    await triage.update_patient(redis, current_user)
+    if current_user.role == UserRole.doctor:
+        await doctor_roster.bump_version(redis)
 
     return current_user
 
 
 @router.get("/profile-completion", response_model=dict)
 async def check_profile_completion(
-    current_user: User = Depends(get_current_user),
+    current_user: UserRead = Depends(get_current_principal),
 ):
     """
     Check if user profile is complete
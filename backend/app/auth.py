@@ -5,10 +5,15 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import ExpiredSignatureError, JWTError, jwt
 from passlib.context import CryptContext
-from sqlmodel import Session, select
+from redis.asyncio import Redis
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.password_pool import PasswordPoolSaturated, password_pool
+from app.core.principal_cache import principal_cache
+from app.core.redis import get_redis
 from app.database import get_session
-from app.models import User
+from app.models import User, UserRead
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -27,14 +32,39 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def _pool_saturated(exc: PasswordPoolSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please try again shortly",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash the password in the password pool"""
+    try:
+        return await password_pool.run(hash_password, password)
+    except PasswordPoolSaturated as e:
+        raise _pool_saturated(e) from e
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify the password in the password pool"""
+    try:
+        return await password_pool.run(verify_password, plain_password, hashed_password)
+    except PasswordPoolSaturated as e:
+        raise _pool_saturated(e) from e
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
+    now = datetime.now(UTC)
     if expires_delta:
-        expire = datetime.now(UTC) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(UTC) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -58,13 +88,9 @@ def decode_token(token: str) -> dict:
         ) from e
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
-) -> User:
-    """Get current user from token (Dependency)"""
-    token = credentials.credentials
-    payload = decode_token(token)
+def token_identity(credentials: HTTPAuthorizationCredentials) -> tuple[int, int]:
+    """Return (user id, issued-at) from a bearer token"""
+    payload = decode_token(credentials.credentials)
 
     user_id_str: str = payload.get("sub")
     if user_id_str is None:
@@ -83,7 +109,12 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         ) from e
 
-    user = session.get(User, user_id)
+    # Tokens issued before iat was added share one cache slot
+    return user_id, int(payload.get("iat") or 0)
+
+
+async def _load_user(session: AsyncSession, user_id: int) -> User:
+    user = await session.get(User, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -92,14 +123,44 @@ async def get_current_user(
         )
     return user
 
-def authenticate_user(email: str, password: str, session: Session) -> User | None:
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+) -> User:
+    """Get current user from token as a database row (Dependency)"""
+    user_id, iat = token_identity(credentials)
+    user = await _load_user(session, user_id)
+    await principal_cache.set(redis, iat, UserRead.model_validate(user))
+    return user
+
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+) -> UserRead:
+    """
+    Get current user from token as a cached read-only snapshot (Dependency)
+    Use for role checks and reads; a cache hit costs no database round trip.
+    """
+    user_id, iat = token_identity(credentials)
+    principal = await principal_cache.get(redis, user_id, iat)
+    if principal is None:
+        principal = UserRead.model_validate(await _load_user(session, user_id))
+        await principal_cache.set(redis, iat, principal)
+    return principal
+
+
+async def authenticate_user(email: str, password: str, session: AsyncSession) -> User | None:
     """Authenticate user"""
     statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
 
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
 
     return user
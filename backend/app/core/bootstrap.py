@@ -0,0 +1,318 @@
+"""
+Single-flight startup.
+
+Every worker process runs the app lifespan, but only one of them should
+migrate and seed. All workers take a Postgres advisory lock in turn: the
+first one applies the schema, seeds an empty database and records the
+schema fingerprint in bootstrap_state. Workers that get the lock after it
+find the fingerprint and return right away, so waiting on the lock is the
+readiness signal. A new release changes the fingerprint and migrates once
+more. Per-phase timings are printed and exported as metrics.
+"""
+
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from prometheus_client import Gauge
+from sqlalchemy import exists, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import SQLModel, select
+
+from app.auth import hash_password
+from app.core.password_pool import password_pool
+from app.core.redis import get_redis
+from app.database import SCHEMA_UPGRADES, async_session, create_db_and_tables, engine
+from app.models import Appointment, AppointmentStatus, User, UserRole
+from app.services import doctor_roster, triage
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+BOOTSTRAP_LOCK_KEY = 7_140_311_027
+BOOTSTRAP_LOCK_TIMEOUT = os.getenv("BOOTSTRAP_LOCK_TIMEOUT", "120s")
+SEED_DOCTOR_PASSWORD = "Doctor123!"
+SEED_PATIENT_PASSWORD = "Patient123!"
+
+BOOT_PHASE_SECONDS = Gauge(
+    "app_bootstrap_phase_seconds",
+    "Duration of each startup phase in this worker",
+    ["phase"],
+)
+
+SEED_DOCTORS = [
+    {
+        "email": "sarah.chen@hospital.com",
+        "full_name": "Dr. Sarah Chen",
+        "department": "Cardiology",
+        "phone": "(555) 100-0001",
+        "age": 42,
+        "gender": "Female",
+    },
+    {
+        "email": "michael.roberts@hospital.com",
+        "full_name": "Dr. Michael Roberts",
+        "department": "Cardiology",
+        "phone": "(555) 100-0002",
+        "age": 48,
+        "gender": "Male",
+    },
+    {
+        "email": "emily.thompson@hospital.com",
+        "full_name": "Dr. Emily Thompson",
+        "department": "Dermatology",
+        "phone": "(555) 100-0003",
+        "age": 38,
+        "gender": "Female",
+    },
+    {
+        "email": "james.wilson@hospital.com",
+        "full_name": "Dr. James Wilson",
+        "department": "Orthopedics",
+        "phone": "(555) 100-0004",
+        "age": 52,
+        "gender": "Male",
+    },
+    {
+        "email": "maria.garcia@hospital.com",
+        "full_name": "Dr. Maria Garcia",
+        "department": "Pediatrics",
+        "phone": "(555) 100-0005",
+        "age": 36,
+        "gender": "Female",
+    },
+    {
+        "email": "david.lee@hospital.com",
+        "full_name": "Dr. David Lee",
+        "department": "Neurology",
+        "phone": "(555) 100-0006",
+        "age": 45,
+        "gender": "Male",
+    },
+    {
+        "email": "amara.chen@hospital.com",
+        "full_name": "Dr. Amara Chen",
+        "department": "General Medicine",
+        "phone": "(555) 100-0007",
+        "age": 40,
+        "gender": "Female",
+    },
+    {
+        "email": "robert.smith@hospital.com",
+        "full_name": "Dr. Robert Smith",
+        "department": "Gastroenterology",
+        "phone": "(555) 100-0008",
+        "age": 50,
+        "gender": "Male",
+    },
+]
+SEED_PATIENTS = [
+    {
+        "email": "patient@hospital.com",
+        "full_name": "John Doe",
+        "phone": "(555) 123-4567",
+        "age": 45,
+        "gender": "Male",
+        "medical_history": "Hypertension, Type 2 Diabetes",
+        "allergies": "Penicillin",
+    },
+    {
+        "email": "jane.smith@example.com",
+        "full_name": "Jane Smith",
+        "phone": "(555) 234-5678",
+        "age": 32,
+        "gender": "Female",
+        "medical_history": "Asthma",
+        "allergies": "None",
+    },
+    {
+        "email": "mike.johnson@example.com",
+        "full_name": "Mike Johnson",
+        "phone": "(555) 345-6789",
+        "age": 58,
+        "gender": "Male",
+        "medical_history": "High cholesterol",
+        "allergies": "Sulfa drugs",
+    },
+    {
+        "email": "sarah.williams@example.com",
+        "full_name": "Sarah Williams",
+        "phone": "(555) 456-7890",
+        "age": 28,
+        "gender": "Female",
+        "medical_history": "None",
+        "allergies": "Latex",
+    },
+    {
+        "email": "aziz.karim@example.com",
+        "full_name": "Aziz Karim",
+        "phone": "(555) 567-8901",
+        "age": 35,
+        "gender": "Male",
+        "medical_history": "Chest Pain",
+        "allergies": "None",
+    },
+    {
+        "email": "leila.aydin@example.com",
+        "full_name": "Leila Aydin",
+        "phone": "(555) 678-9012",
+        "age": 29,
+        "gender": "Female",
+        "medical_history": "Fever",
+        "allergies": "None",
+    },
+    {
+        "email": "marcus.lee@example.com",
+        "full_name": "Marcus Lee",
+        "phone": "(555) 789-0123",
+        "age": 42,
+        "gender": "Male",
+        "medical_history": "Severe Headache",
+        "allergies": "Aspirin",
+    },
+]
+
+
+class _Timings:
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+            BOOT_PHASE_SECONDS.labels(name).set(self.phases[name])
+
+    def summary(self) -> str:
+        total = time.perf_counter() - self.started
+        BOOT_PHASE_SECONDS.labels("total").set(total)
+        return f"{total:.2f}s (" + ", ".join(f"{k} {v:.2f}s" for k, v in self.phases.items()) + ")"
+
+
+def schema_fingerprint() -> str:
+    """Hash of the DDL this release expects"""
+    dialect = engine.dialect
+    parts = []
+    for table in SQLModel.metadata.sorted_tables:
+        parts.append(str(CreateTable(table).compile(dialect=dialect)))
+        parts.extend(str(CreateIndex(index).compile(dialect=dialect)) for index in table.indexes)
+    parts.extend(SCHEMA_UPGRADES)
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+async def _seed(timings: _Timings) -> bool:
+    """Insert the demo data into an empty database; False if users exist"""
+    async with async_session() as session:
+        with timings.phase("probe"):
+            has_users = (await session.exec(select(exists().select_from(User)))).one()
+        if has_users:
+            return False
+
+        with timings.phase("hash"):
+            # bcrypt is slow: hash all seed passwords in parallel in the pool
+            hashes = iter(
+                await password_pool.map(
+                    hash_password,
+                    [SEED_DOCTOR_PASSWORD] * len(SEED_DOCTORS)
+                    + [SEED_PATIENT_PASSWORD] * len(SEED_PATIENTS),
+                )
+            )
+
+        with timings.phase("seed"):
+            doctors = [
+                User(**doctor, role=UserRole.doctor, password_hash=next(hashes))
+                for doctor in SEED_DOCTORS
+            ]
+            patients = [
+                User(**patient, role=UserRole.patient, password_hash=next(hashes))
+                for patient in SEED_PATIENTS
+            ]
+            session.add_all(doctors + patients)
+            await session.flush()
+
+            # Sample appointments for today with Dr. Sarah Chen
+            today = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+            session.add_all(
+                [
+                    Appointment(
+                        doctor_id=doctors[0].id,
+                        patient_id=patients[0].id,  # John Doe
+                        start_time=today,
+                        appointment_type="Consultation",
+                        notes="Follow-up on medication adjustments",
+                        status=AppointmentStatus.active,
+                    ),
+                    Appointment(
+                        doctor_id=doctors[0].id,
+                        patient_id=patients[1].id,  # Jane Smith
+                        start_time=today + timedelta(hours=1),
+                        appointment_type="Follow-up",
+                        notes="Review test results",
+                        status=AppointmentStatus.active,
+                    ),
+                    Appointment(
+                        doctor_id=doctors[0].id,
+                        patient_id=patients[2].id,  # Mike Johnson
+                        start_time=today + timedelta(hours=5),
+                        appointment_type="Check-up",
+                        notes="Annual physical examination",
+                        status=AppointmentStatus.active,
+                    ),
+                    Appointment(
+                        doctor_id=doctors[0].id,
+                        patient_id=patients[3].id,  # Sarah Williams
+                        start_time=today + timedelta(hours=6, minutes=30),
+                        appointment_type="Consultation",
+                        notes="New patient consultation",
+                        status=AppointmentStatus.active,
+                    ),
+                ]
+            )
+            await session.commit()
+
+        # Seed patients bypass the profile endpoints; rebuild the queue
+        await triage.reset(get_redis())
+        await doctor_roster.bump_version(get_redis())
+    print(f"✅ Seed data added: {len(doctors)} Doctors, {len(patients)} Patients, 4 Appointments")
+    return True
+
+
+async def run():
+    """Migrate and seed once across all workers; returns when the database is ready"""
+    timings = _Timings()
+    fingerprint = schema_fingerprint()
+    # Transaction-scoped lock, released by the commit: unlike a session lock
+    # it also holds behind PgBouncer in transaction pooling mode
+    async with engine.begin() as lock_conn:
+        with timings.phase("lock"):
+            await lock_conn.execute(text(f"SET LOCAL lock_timeout = '{BOOTSTRAP_LOCK_TIMEOUT}'"))
+            await lock_conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": BOOTSTRAP_LOCK_KEY})
+            await lock_conn.execute(text("SET LOCAL lock_timeout = 0"))
+        await lock_conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS bootstrap_state "
+                "(fingerprint text PRIMARY KEY, completed_at timestamp NOT NULL DEFAULT now())"
+            )
+        )
+        done = (
+            await lock_conn.execute(
+                text("SELECT EXISTS (SELECT 1 FROM bootstrap_state WHERE fingerprint = :fp)"),
+                {"fp": fingerprint},
+            )
+        ).scalar_one()
+        if done:
+            print(f"Startup ready in {timings.summary()}: schema already bootstrapped")
+            return
+
+        with timings.phase("schema"):
+            await create_db_and_tables()
+        seeded = await _seed(timings)
+        await lock_conn.execute(
+            text("INSERT INTO bootstrap_state (fingerprint) VALUES (:fp) ON CONFLICT DO NOTHING"),
+            {"fp": fingerprint},
+        )
+    print(f"Startup ready in {timings.summary()}: migrated{', seeded' if seeded else ''}")
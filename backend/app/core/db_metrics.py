@@ -0,0 +1,149 @@
+"""
+Per-request database cost.
+
+SQLAlchemy cursor events count the queries, rows and time of every
+statement into the stats of the current request (a contextvar set by
+DBCostMiddleware). The middleware exports them as per-route histograms,
+reports them to the client in a Server-Timing header and logs requests
+that look like N+1 loops. Statements slower than DB_SLOW_QUERY_MS are
+logged wherever they run.
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from prometheus_client import Histogram
+from prometheus_fastapi_instrumentator.routing import get_route_name
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "20"))
+
+REQUEST_QUERIES = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed per request",
+    ["method", "handler"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_ROWS = Histogram(
+    "db_rows_per_request",
+    "Rows returned or affected per request",
+    ["method", "handler"],
+    buckets=(0, 1, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "db_time_per_request_seconds",
+    "Time spent executing SQL per request",
+    ["method", "handler"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+@dataclass
+class QueryStats:
+    queries: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("db_query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the cost of every statement run inside the block"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, which is dropped with a failed
+    # statement, rather than on the long-lived connection
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_start", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:500])
+
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        # -1 for server-side cursors, whose rows are fetched later
+        stats.rows += max(cursor.rowcount, 0)
+        stats.seconds += elapsed
+        stats.statements[statement] += 1
+
+
+def instrument_engine(engine):
+    """Attach the cost hooks to an Engine or AsyncEngine"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def server_timing(stats: QueryStats) -> str:
+    return f'db;dur={stats.seconds * 1000:.1f};desc="{stats.queries} queries, {stats.rows} rows"'
+
+
+class DBCostMiddleware:
+    """Per-route query cost metrics, Server-Timing header and N+1 log"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_timing(message: Message):
+                # Work done while streaming a body is only in the metrics
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append("Server-Timing", server_timing(stats))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                self._observe(scope, stats)
+
+    def _observe(self, scope: Scope, stats: QueryStats):
+        handler = get_route_name(Request(scope)) or "none"
+        method = scope["method"]
+        REQUEST_QUERIES.labels(method, handler).observe(stats.queries)
+        REQUEST_ROWS.labels(method, handler).observe(stats.rows)
+        REQUEST_DB_SECONDS.labels(method, handler).observe(stats.seconds)
+        if stats.queries > N_PLUS_ONE_THRESHOLD:
+            statement, count = stats.statements.most_common(1)[0]
+            logger.warning(
+                "%s %s ran %d queries (possible N+1); %dx: %s",
+                method,
+                handler,
+                stats.queries,
+                count,
+                " ".join(statement.split())[:300],
+            )
@@ -0,0 +1,37 @@
+"""
+Sparse fieldsets for user-bearing responses.
+
+?fields=id,full_name,department limits each user in the response to those
+UserRead fields (id is always included). The field set is the column list
+of the SELECT, and the rows are serialized as selected (app/core/rows.py),
+so no trimmed response model is needed.
+"""
+
+from fastapi import HTTPException, Query, status
+
+from app.models import User, UserRead
+
+USER_FIELDS = tuple(UserRead.model_fields)
+
+
+def parse_fields(
+    fields: str | None = Query(
+        None, description=f"Comma-separated user fields to return: {','.join(USER_FIELDS)}"
+    ),
+) -> tuple[str, ...] | None:
+    """Requested fields in UserRead order, or None for all of them"""
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(USER_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    requested.add("id")
+    return tuple(name for name in USER_FIELDS if name in requested)
+
+
+def user_columns(fields: tuple[str, ...] = USER_FIELDS) -> list:
+    return [getattr(User, name) for name in fields]
@@ -0,0 +1,185 @@
+"""
+Cached dependency probes for readiness.
+
+A background task probes Postgres, Redis, the database connection pool
+and any read replicas every HEALTH_PROBE_INTERVAL seconds and keeps the latest results, so
+/health/ready only reads memory no matter how often kubelet calls it.
+Postgres is critical: without it requests fail. Redis is not, because
+every Redis-backed feature degrades, and neither are read replicas (their
+probes also decide whether reads are routed to them), so those outages
+only mark the pod degraded. Neither is the connection pool: an exhausted
+snapshot is routine under a burst, requests queue for pool_timeout rather
+than fail, and pulling the pod would push its load onto the others. For
+the same reason the Postgres probe opens its own short-lived connection
+instead of queueing behind requests for a pooled one.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from functools import partial
+
+import asyncpg
+from prometheus_client import Counter, Gauge
+
+from app.core.redis import get_redis
+from app.core.replicas import replica_router
+from app.database import DATABASE_URL, engine
+
+logger = logging.getLogger(__name__)
+
+PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "5"))
+PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2"))
+PROBE_DSN = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+
+DEPENDENCY_UP = Gauge("health_dependency_up", "1 if the last probe succeeded", ["dependency"])
+DEPENDENCY_LATENCY = Gauge(
+    "health_dependency_latency_seconds", "Latency of the last probe", ["dependency"]
+)
+PROBE_FAILURES = Counter("health_probe_failures_total", "Failed dependency probes", ["dependency"])
+
+Probe = Callable[[], Awaitable[dict | None]]
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    latency_ms: float
+    error: str | None = None
+    details: dict = field(default_factory=dict)
+
+
+async def probe_postgres() -> None:
+    """SELECT 1 on an unpooled connection, so a busy pool does not fail it"""
+    conn = await asyncpg.connect(PROBE_DSN, timeout=PROBE_TIMEOUT)
+    try:
+        # Simple query protocol: nothing is prepared (safe behind PgBouncer)
+        await conn.execute("SELECT 1")
+    finally:
+        await conn.close()
+
+
+async def probe_redis() -> None:
+    await get_redis().ping()
+
+
+async def probe_db_pool() -> dict:
+    """Fails (degraded) when every connection is checked out and the overflow is used up"""
+    pool = engine.pool
+    details = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    if details["checked_out"] >= details["size"] + details["max_overflow"]:
+        raise RuntimeError("connection pool exhausted")
+    return details
+
+
+class HealthMonitor:
+    """Runs the probes on an interval and serves the cached verdict."""
+
+    def __init__(
+        self,
+        probes: dict[str, Probe],
+        critical: set[str],
+        interval: float = PROBE_INTERVAL,
+        timeout: float = PROBE_TIMEOUT,
+    ):
+        self.probes = probes
+        self.critical = critical
+        self.interval = interval
+        self.timeout = timeout
+        self.results: dict[str, ProbeResult] = {}
+        self.checked_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    async def _run_probe(self, name: str, probe: Probe) -> ProbeResult:
+        started = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(probe(), self.timeout)
+            result = ProbeResult(True, 0.0, details=details or {})
+        except TimeoutError:
+            result = ProbeResult(False, 0.0, error=f"timed out after {self.timeout}s")
+        except Exception as e:
+            result = ProbeResult(False, 0.0, error=str(e) or type(e).__name__)
+        result.latency_ms = (time.perf_counter() - started) * 1000
+
+        DEPENDENCY_UP.labels(name).set(1 if result.ok else 0)
+        DEPENDENCY_LATENCY.labels(name).set(result.latency_ms / 1000)
+        if not result.ok:
+            PROBE_FAILURES.labels(name).inc()
+        return result
+
+    async def check(self):
+        """Probe every dependency concurrently and cache the results"""
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._run_probe(name, self.probes[name]) for name in names))
+        self.results = dict(zip(names, results, strict=True))
+        self.checked_at = time.monotonic()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Health probe round failed")
+
+    async def start(self):
+        """First round inline, then in the background (app lifespan startup)"""
+        await self.check()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def report(self) -> tuple[bool, dict]:
+        """(ready, body) from the cached results"""
+        if self.checked_at is None:
+            return False, {"status": "starting", "checks": {}}
+        age = time.monotonic() - self.checked_at
+        checks = {
+            name: {
+                "ok": result.ok,
+                "latency_ms": round(result.latency_ms, 2),
+                **({"error": result.error} if result.error else {}),
+                **result.details,
+            }
+            for name, result in self.results.items()
+        }
+        # A stuck probe loop must not keep reporting old successes
+        stale = age > 3 * self.interval + self.timeout
+        ready = not stale and all(self.results[name].ok for name in self.critical)
+        if not ready:
+            status = "unavailable"
+        elif all(result.ok for result in self.results.values()):
+            status = "ok"
+        else:
+            status = "degraded"
+        return ready, {"status": status, "checked_seconds_ago": round(age, 2), "checks": checks}
+
+
+health_monitor = HealthMonitor(
+    {
+        "postgres": probe_postgres,
+        "redis": probe_redis,
+        "db_pool": probe_db_pool,
+        # Replicas are optional: reads fall back to the primary
+        **{
+            f"replica:{replica.name}": partial(replica_router.probe, replica)
+            for replica in replica_router.replicas
+        },
+    },
+    critical={"postgres"},
+)
@@ -0,0 +1,193 @@
+"""
+Idempotency keys for retried POSTs.
+
+Clients that retry POST /appointments or POST /auth/register send an
+Idempotency-Key header. The first request with a key runs normally and its
+response (status, headers, body) is stored in Redis for IDEMPOTENCY_TTL
+seconds; duplicates get that response replayed byte for byte instead of
+hashing a password or booking again. A duplicate that arrives while the
+original is still running waits for its response.
+
+Keys are scoped to the route and the Authorization header, and a key
+reused with a different body is rejected with 422. Only successes and
+errors that the same request would get again (STORED_ERRORS) are stored;
+transient ones (429 rate limits, 401/403, 408, server errors) are not, so
+the client's retry runs again. If Redis is unavailable requests
+run without deduplication.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENT_ROUTES = {("POST", "/appointments"), ("POST", "/auth/register")}
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+# Upper bound for the original request; a crashed worker's marker expires
+IDEMPOTENCY_LOCK_TTL = int(os.getenv("IDEMPOTENCY_LOCK_TTL", "30"))
+POLL_INTERVAL = 0.05
+MAX_KEY_LENGTH = 255
+# Deterministic for the same body: replaying them is safe
+STORED_ERRORS = {400, 404, 409, 422}
+
+IDEMPOTENT_REQUESTS = Counter(
+    "idempotent_requests_total", "Requests carrying an Idempotency-Key, by outcome", ["outcome"]
+)
+
+
+def _redis_key(scope: Scope, headers: Headers, key: str) -> str:
+    caller = hashlib.sha256(headers.get("authorization", "").encode()).hexdigest()[:16]
+    return f"idempotency:{scope['method']}:{scope['path']}:{caller}:{key}"
+
+
+def _error(scope: Scope, status_code: int, message: str, headers: dict | None = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": message, "status_code": status_code, "path": scope["path"]},
+        headers=headers,
+    )
+
+
+class IdempotencyMiddleware:
+    """Stores and replays responses of POSTs sent with an Idempotency-Key"""
+
+    def __init__(self, app: ASGIApp, routes: set[tuple[str, str]] = IDEMPOTENT_ROUTES):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or (scope["method"], scope["path"].rstrip("/")) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = _error(scope, 400, f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+            await response(scope, receive, send)
+            return
+
+        # The body is needed for the fingerprint, so read it up front
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        async def replay_receive() -> Message:
+            nonlocal body
+            chunk, body = body, b""
+            return {"type": "http.request", "body": chunk, "more_body": False}
+
+        redis_key = _redis_key(scope, headers, key)
+        try:
+            first = await self._claim(scope, replay_receive, send, redis_key, fingerprint)
+        except RedisError as e:
+            logger.warning("Idempotency store unavailable: %s", e)
+            IDEMPOTENT_REQUESTS.labels("unavailable").inc()
+            await self.app(scope, replay_receive, send)
+            return
+        if first:
+            IDEMPOTENT_REQUESTS.labels("executed").inc()
+            await self._execute(scope, replay_receive, send, redis_key, fingerprint)
+
+    async def _claim(
+        self, scope: Scope, receive: Receive, send: Send, redis_key: str, fingerprint: str
+    ) -> bool:
+        """True if this is the first request with the key; otherwise answers the duplicate"""
+        redis = get_redis()
+        pending = json.dumps({"fingerprint": fingerprint})
+        deadline = time.monotonic() + IDEMPOTENCY_LOCK_TTL
+        while not await redis.set(redis_key, pending, nx=True, ex=IDEMPOTENCY_LOCK_TTL):
+            stored = await redis.get(redis_key)
+            if stored is None:
+                # The original failed and released the key: run it ourselves
+                continue
+            entry = json.loads(stored)
+            if entry["fingerprint"] != fingerprint:
+                IDEMPOTENT_REQUESTS.labels("mismatch").inc()
+                response = _error(
+                    scope, 422, f"{IDEMPOTENCY_HEADER} was already used for a different request"
+                )
+                await response(scope, receive, send)
+                return False
+            if "status" in entry:
+                IDEMPOTENT_REQUESTS.labels("replayed").inc()
+                await self._replay(entry, send)
+                return False
+            if time.monotonic() >= deadline:
+                IDEMPOTENT_REQUESTS.labels("in_progress").inc()
+                response = _error(
+                    scope,
+                    409,
+                    f"A request with this {IDEMPOTENCY_HEADER} is still in progress",
+                    headers={"Retry-After": "1"},
+                )
+                await response(scope, receive, send)
+                return False
+            await asyncio.sleep(POLL_INTERVAL)
+        return True
+
+    async def _execute(self, scope: Scope, receive: Receive, send: Send, redis_key: str, fingerprint: str):
+        redis = get_redis()
+        start: Message | None = None
+        chunks: list[bytes] = []
+
+        async def send_and_capture(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_capture)
+        except BaseException:
+            await self._release(redis_key)
+            raise
+        if start is None or not (200 <= start["status"] < 300 or start["status"] in STORED_ERRORS):
+            await self._release(redis_key)
+            return
+        entry = {
+            "fingerprint": fingerprint,
+            "status": start["status"],
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in start["headers"]],
+            "body": base64.b64encode(b"".join(chunks)).decode(),
+        }
+        try:
+            await redis.set(redis_key, json.dumps(entry), ex=IDEMPOTENCY_TTL)
+        except RedisError as e:
+            logger.warning("Could not store idempotent response: %s", e)
+
+    async def _release(self, redis_key: str):
+        try:
+            await get_redis().delete(redis_key)
+        except RedisError:
+            # The marker expires after IDEMPOTENCY_LOCK_TTL
+            pass
+
+    async def _replay(self, entry: dict, send: Send):
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in entry["headers"]]
+        headers.append((REPLAYED_HEADER.lower().encode(), b"true"))
+        await send({"type": "http.response.start", "status": entry["status"], "headers": headers})
+        await send({"type": "http.response.body", "body": base64.b64decode(entry["body"])})
@@ -0,0 +1,41 @@
+"""
+Opaque keyset cursors.
+
+A cursor encodes the sort key of the last row of a page; the next page
+starts strictly after it, so paging stays O(page) at any depth and is
+stable under concurrent inserts.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*key: Any) -> str:
+    """Encode a sort key (ints, strings, datetimes) as a URL-safe token"""
+    values = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in key]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, *types: type) -> list[Any]:
+    """Decode a cursor produced by encode_cursor, checking each value's type"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong cursor size")
+        key = [datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v for v in values]
+        if not all(isinstance(v, t) for v, t in zip(key, types, strict=True)):
+            raise ValueError("wrong cursor value type")
+        return key
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        ) from e
@@ -0,0 +1,120 @@
+"""
+Bounded process pool for password hashing.
+
+bcrypt costs ~250ms of CPU per call; running it inline in an async handler
+freezes the whole worker. Hashing and verification are shipped to a small
+process pool instead, with an admission limit so that a login spike fails
+fast (503 + Retry-After) rather than queueing without bound.
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from prometheus_client import Counter, Gauge, Histogram
+
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", "2"))
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", "32"))
+
+QUEUE_DEPTH = Gauge(
+    "password_pool_queue_depth", "Password hash jobs submitted but not finished"
+)
+WAIT_SECONDS = Histogram(
+    "password_pool_wait_seconds",
+    "Time a password hash job waited for a pool process",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RUN_SECONDS = Histogram(
+    "password_pool_run_seconds",
+    "Time spent hashing or verifying inside a pool process",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+REJECTED = Counter(
+    "password_pool_rejected_total", "Password hash jobs rejected because the pool was saturated"
+)
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when the pool already has the maximum number of pending jobs."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Password pool saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any) -> tuple[float, float, Any]:
+    """Run inside the pool process; report when the job actually started."""
+    started = time.monotonic()
+    result = fn(*args)
+    return started, time.monotonic() - started, result
+
+
+class PasswordPool:
+    """Process pool with an admission limit and queue metrics."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._avg_run_seconds = 0.25
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs an event loop and
+            # driver threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def retry_after(self) -> int:
+        """Estimated seconds until the current backlog drains."""
+        return max(1, math.ceil(self._pending * self._avg_run_seconds / self.workers))
+
+    async def run(self, fn: Callable[..., Any], *args: Any, admit: bool = True) -> Any:
+        """
+        Run fn(*args) in the pool.
+        With admit=True the job is rejected when the pool is saturated.
+        """
+        if admit and self._pending >= self.max_pending:
+            REJECTED.inc()
+            raise PasswordPoolSaturated(self.retry_after())
+
+        self._pending += 1
+        QUEUE_DEPTH.set(self._pending)
+        submitted = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            started, run_seconds, result = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, *args
+            )
+        finally:
+            self._pending -= 1
+            QUEUE_DEPTH.set(self._pending)
+
+        WAIT_SECONDS.observe(max(0.0, started - submitted))
+        RUN_SECONDS.observe(run_seconds)
+        self._avg_run_seconds = 0.9 * self._avg_run_seconds + 0.1 * run_seconds
+        return result
+
+    async def map(self, fn: Callable[..., Any], items: list[Any]) -> list[Any]:
+        """Run fn over items in parallel; used by seeding and tooling, never rejected."""
+        return list(await asyncio.gather(*(self.run(fn, item, admit=False) for item in items)))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool(HASH_POOL_WORKERS, HASH_POOL_MAX_PENDING)
@@ -0,0 +1,166 @@
+"""
+Two-tier cache of authenticated principals.
+
+Tier 1 is a per-process LRU with a short TTL, tier 2 a Redis hash per user
+shared by every worker. Entries are keyed by user id and the token's `iat`,
+so a freshly issued token never sees a snapshot older than itself.
+Invalidations delete the Redis entry and are published on a channel that
+every worker listens to, so profile and role changes leave the local tiers
+at once rather than after PRINCIPAL_LOCAL_TTL. A worker that loses the
+subscription drops its whole local tier, since it may have missed some.
+Redis errors degrade to a database lookup; they never fail a request.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.models import UserRead
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_LOCAL_TTL = float(os.getenv("PRINCIPAL_LOCAL_TTL", "30"))
+PRINCIPAL_REDIS_TTL = int(os.getenv("PRINCIPAL_REDIS_TTL", "300"))
+INVALIDATION_CHANNEL = "principal:invalidations"
+# Published instead of a user id: drop every local entry
+INVALIDATE_ALL = "*"
+RESUBSCRIBE_DELAY = 1.0
+
+
+class TTLCache:
+    """Small LRU with per-entry expiry."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[tuple[int, int], tuple[float, UserRead]] = OrderedDict()
+
+    def get(self, key: tuple[int, int]) -> UserRead | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: tuple[int, int], value: UserRead):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard_user(self, user_id: int):
+        for key in [k for k in self._data if k[0] == user_id]:
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+
+
+def _redis_key(user_id: int) -> str:
+    return f"principal:{user_id}"
+
+
+class PrincipalCache:
+    """In-process LRU in front of a shared Redis tier."""
+
+    def __init__(self, local: TTLCache, redis_ttl: int):
+        self.local = local
+        self.redis_ttl = redis_ttl
+        self._task: asyncio.Task | None = None
+
+    async def get(self, redis: Redis, user_id: int, iat: int) -> UserRead | None:
+        principal = self.local.get((user_id, iat))
+        if principal is not None:
+            return principal
+
+        try:
+            raw = await redis.hget(_redis_key(user_id), str(iat))
+        except RedisError:
+            return None
+        if raw is None:
+            return None
+
+        principal = UserRead.model_validate_json(raw)
+        self.local.set((user_id, iat), principal)
+        return principal
+
+    async def set(self, redis: Redis, iat: int, principal: UserRead):
+        self.local.set((principal.id, iat), principal)
+        key = _redis_key(principal.id)
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, str(iat), principal.model_dump_json())
+                pipe.expire(key, self.redis_ttl)
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    async def invalidate(self, redis: Redis, user_id: int):
+        """Drop every cached snapshot of a user, here and in every other worker"""
+        self.local.discard_user(user_id)
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.delete(_redis_key(user_id))
+                pipe.publish(INVALIDATION_CHANNEL, user_id)
+                await pipe.execute()
+        except RedisError:
+            # Other workers' local tiers expire within PRINCIPAL_LOCAL_TTL
+            pass
+
+    async def invalidate_all(self, redis: Redis):
+        """Drop every cached principal, e.g. after users were replaced outside the API"""
+        self.local.clear()
+        try:
+            async for key in redis.scan_iter(match="principal:*", count=1000):
+                await redis.delete(key)
+            await redis.publish(INVALIDATION_CHANNEL, INVALIDATE_ALL)
+        except RedisError:
+            pass
+
+    async def _listen(self, redis: Redis):
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    # Anything published before the subscription was missed
+                    self.local.clear()
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is None:
+                            continue
+                        if message["data"] == INVALIDATE_ALL:
+                            self.local.clear()
+                        else:
+                            self.local.discard_user(int(message["data"]))
+            except (RedisError, OSError) as e:
+                logger.warning("Principal invalidation channel lost: %s", e)
+                self.local.clear()
+                await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+    async def start(self, redis: Redis):
+        """Follow invalidations from other workers (app lifespan startup)"""
+        self._task = asyncio.create_task(self._listen(redis))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+principal_cache = PrincipalCache(
+    TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_LOCAL_TTL), PRINCIPAL_REDIS_TTL
+)
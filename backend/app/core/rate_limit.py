@@ -0,0 +1,223 @@
+"""
+Admission control: per-client rate limits and a per-worker concurrency cap.
+
+Rate limits are token buckets in Redis, updated atomically by a Lua script
+so every worker and pod shares them. A bucket belongs to one client (the
+user id of a valid bearer token, otherwise the client IP) and one route.
+Behind nginx or the ingress the peer is the proxy, so the client IP is the
+nearest X-Forwarded-For hop that is not in TRUSTED_PROXIES (CIDRs, private
+networks by default); hops a client prepends itself are never reached.
+Each router declares its limit as a dependency, configurable from the
+environment as RATE_LIMIT_<NAME>="<requests>/<seconds>"; a rejected request
+gets 429 with Retry-After. If Redis cannot answer, requests are let through.
+
+ConcurrencyLimitMiddleware caps the requests a worker handles at once
+(MAX_CONCURRENT_REQUESTS). Requests beyond the cap get 503 right away
+instead of queueing on an event loop that is already behind.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass
+from ipaddress import ip_address, ip_network
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from prometheus_client import Counter, Gauge
+from redis.asyncio import Redis
+from redis.exceptions import NoScriptError, RedisError
+
+from app.auth import token_identity
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "200"))
+# Probes and scrapes must get through a saturated worker
+UNLIMITED_PATHS = ("/health", "/metrics")
+TRUSTED_PROXIES = [
+    ip_network(network.strip())
+    for network in os.getenv(
+        "TRUSTED_PROXIES", "127.0.0.0/8,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,::1/128"
+    ).split(",")
+    if network.strip()
+]
+
+RATE_LIMITED = Counter(
+    "rate_limit_rejected_total", "Requests rejected with 429 by the rate limiter", ["route"]
+)
+RATE_LIMIT_ERRORS = Counter(
+    "rate_limit_errors_total", "Rate limit checks skipped because Redis failed"
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled by this worker")
+SHED = Counter("http_requests_shed_total", "Requests rejected with 503 by the concurrency cap")
+
+# KEYS[1] bucket; ARGV capacity, refill rate (tokens/s).
+# Returns {allowed (0/1), seconds until a token is available}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+TOKEN_BUCKET_SHA = hashlib.sha1(TOKEN_BUCKET_LUA.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    requests: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.requests / self.seconds
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        requests, _, seconds = value.partition("/")
+        return cls(int(requests), float(seconds or 1))
+
+
+def rate_limit(name: str, default: str) -> RateLimit:
+    """The limit from RATE_LIMIT_<NAME>, e.g. "10/60" for 10 requests a minute"""
+    return RateLimit.parse(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+
+
+_optional_bearer = HTTPBearer(auto_error=False)
+
+
+def _is_trusted(host: str) -> bool:
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """The first address, walking back from the peer, that is not a trusted proxy"""
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted(host):
+        return host
+    forwarded = ",".join(request.headers.getlist("x-forwarded-for"))
+    for hop in reversed([hop.strip() for hop in forwarded.split(",") if hop.strip()]):
+        host = hop
+        if not _is_trusted(hop):
+            break
+    return host
+
+
+async def _take_token(redis: Redis, key: str, limit: RateLimit) -> tuple:
+    try:
+        return await redis.evalsha(TOKEN_BUCKET_SHA, 1, key, limit.requests, limit.rate)
+    except NoScriptError:
+        # First call on this server, or its script cache was flushed
+        await redis.script_load(TOKEN_BUCKET_LUA)
+        return await redis.evalsha(TOKEN_BUCKET_SHA, 1, key, limit.requests, limit.rate)
+
+
+def _client_key(request: Request, credentials: HTTPAuthorizationCredentials | None) -> str:
+    if credentials is not None:
+        try:
+            user_id, _ = token_identity(credentials)
+            return f"user:{user_id}"
+        except HTTPException:
+            # The auth dependency rejects the request; count it against the IP
+            pass
+    return f"ip:{client_ip(request)}"
+
+
+class RateLimiter:
+    """Router dependency: one token bucket per client and route."""
+
+    def __init__(self, limit: RateLimit):
+        self.limit = limit
+
+    async def __call__(
+        self,
+        request: Request,
+        credentials: HTTPAuthorizationCredentials | None = Depends(_optional_bearer),
+        redis: Redis = Depends(get_redis),
+    ):
+        if not RATE_LIMIT_ENABLED:
+            return
+        route = f"{request.method} {request.scope['route'].path}"
+        key = f"ratelimit:{route}:{_client_key(request, credentials)}"
+        try:
+            allowed, wait = await _take_token(redis, key, self.limit)
+        except RedisError as e:
+            RATE_LIMIT_ERRORS.inc()
+            logger.warning("Rate limit check failed, letting %s through: %s", route, e)
+            return
+        if not int(allowed):
+            RATE_LIMITED.labels(route).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(max(1, math.ceil(float(wait))))},
+            )
+
+
+class ConcurrencyLimitMiddleware:
+    """Pure ASGI middleware that sheds requests beyond a per-worker cap."""
+
+    def __init__(self, app, limit: int = MAX_CONCURRENT_REQUESTS):
+        self.app = app
+        self.limit = limit
+        self.in_flight = 0
+
+    async def _reject(self, scope, send):
+        SHED.inc()
+        body = json.dumps(
+            {
+                "error": "Server is busy, please try again shortly",
+                "status_code": 503,
+                "path": scope["path"],
+            }
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", b"1"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(UNLIMITED_PATHS):
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.limit:
+            await self._reject(scope, send)
+            return
+        self.in_flight += 1
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            IN_FLIGHT.dec()
@@ -0,0 +1,114 @@
+"""
+Shared async Redis client.
+
+The connection pool is created in the app lifespan and configured from the
+environment, like app/database.py does for Postgres. REDIS_URL=memory://
+swaps in an in-process fake (fakeredis) so tests and benchmarks run
+without a Redis server.
+"""
+
+import logging
+import os
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+REDIS_HOST = os.getenv("REDIS_HOST", "appointment_redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD") or None
+REDIS_URL = os.getenv("REDIS_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "2"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1"))
+
+MEMORY_URL = "memory://"
+
+POOL_WAIT_SECONDS = Histogram(
+    "redis_pool_wait_seconds",
+    "Time spent waiting for a Redis connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2),
+)
+POOL_ERRORS = Counter(
+    "redis_pool_checkout_errors_total",
+    "Redis connection checkouts that timed out or could not connect",
+)
+POOL_IN_USE = Gauge("redis_pool_connections_in_use", "Redis connections checked out")
+POOL_IDLE = Gauge("redis_pool_connections_idle", "Open Redis connections waiting in the pool")
+POOL_MAX = Gauge("redis_pool_connections_max", "Redis connection pool size")
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """Blocking pool that records checkout wait time and failures."""
+
+    async def get_connection(self, command_name, *keys, **options):
+        started = time.perf_counter()
+        try:
+            return await super().get_connection(command_name, *keys, **options)
+        except RedisConnectionError:
+            POOL_ERRORS.inc()
+            raise
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+
+_client: Redis | None = None
+
+
+def create_redis(url: str = REDIS_URL) -> Redis:
+    """Build a client for url; connections are opened lazily on first command"""
+    if url.startswith(MEMORY_URL):
+        from fakeredis.aioredis import FakeRedis
+
+        return FakeRedis(decode_responses=True)
+
+    pool = InstrumentedConnectionPool.from_url(
+        url,
+        password=REDIS_PASSWORD,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        health_check_interval=30,
+        decode_responses=True,
+    )
+    # redis-py keeps no public counters; these read the pool's own bookkeeping
+    POOL_IN_USE.set_function(lambda: len(pool._in_use_connections))
+    POOL_IDLE.set_function(lambda: len(pool._available_connections))
+    POOL_MAX.set(pool.max_connections)
+    return Redis(connection_pool=pool)
+
+
+async def init_redis() -> Redis:
+    """Create the shared client (app lifespan startup)"""
+    global _client
+    if _client is None:
+        _client = create_redis()
+    try:
+        await _client.ping()
+    except (RedisError, OSError) as e:
+        # Redis-backed features degrade instead of failing; do not block boot
+        logger.warning("Redis is not reachable at startup: %s", e)
+    return _client
+
+
+async def close_redis():
+    """Close the shared client and its pool (app lifespan shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_redis() -> Redis:
+    """Provide the shared async Redis client"""
+    global _client
+    if _client is None:
+        # Scripts and tests that do not run the lifespan
+        _client = create_redis()
+    return _client
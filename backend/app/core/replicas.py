@@ -0,0 +1,201 @@
+"""
+Read routing to Postgres streaming replicas.
+
+Read-only endpoints take get_read_session, which hands out a session on a
+random healthy replica and falls back to the primary when:
+
+- no replica is configured, or none passed its last health probe
+  (unreachable, or replay lag above REPLICA_MAX_LAG_SECONDS);
+- the caller wrote recently: writes mark the user sticky in Redis for
+  REPLICA_STICKY_SECONDS, so they read their own writes from the primary
+  (if Redis cannot answer, reads stay on the primary);
+- the replica connection cannot be opened.
+
+Replica health is refreshed by the readiness probe loop (app/core/health.py).
+Endpoints that read only on some paths take get_lazy_read_session instead,
+which routes and connects on first use, so paths served from a cache never
+check out a connection.
+
+To try it locally, start a standby of the dev database on a second port
+(e.g. pg_basebackup -R into a data directory served on 5433) and set
+POSTGRES_REPLICA_HOSTS=localhost:5433. A server that is not in recovery
+is never used as a replica.
+"""
+
+import os
+import random
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from prometheus_client import Counter, Gauge
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth import token_identity
+from app.core.redis import get_redis
+from app.database import async_session, replica_engines
+
+MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+# Zero while the replica has replayed everything it received, so an idle
+# primary does not look like lag
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN NULL
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+READ_ROUTES = Counter("db_read_route_total", "Read sessions handed out, by target", ["target"])
+REPLICA_FALLBACKS = Counter(
+    "db_replica_fallback_total", "Reads sent to the primary although replicas exist", ["reason"]
+)
+REPLICA_LAG = Gauge("db_replica_lag_seconds", "Replay lag at the last probe", ["replica"])
+
+
+def _sticky_key(user_id: int) -> str:
+    return f"replica:sticky:{user_id}"
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker
+    available: bool = False
+
+
+class ReplicaRouter:
+    """Picks the engine for a read session."""
+
+    def __init__(self, engines: dict[str, AsyncEngine], primary: async_sessionmaker):
+        self.primary = primary
+        self.replicas = [
+            Replica(name, engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+            for name, engine in engines.items()
+        ]
+
+    async def probe(self, replica: Replica) -> dict:
+        """Health probe: measures replay lag and updates availability"""
+        try:
+            async with replica.engine.connect() as conn:
+                lag = (await conn.execute(text(LAG_SQL))).scalar_one()
+        except Exception:
+            replica.available = False
+            raise
+        if lag is None:
+            replica.available = False
+            raise RuntimeError("not in recovery (not a replica)")
+        REPLICA_LAG.labels(replica.name).set(float(lag))
+        replica.available = lag <= MAX_LAG_SECONDS
+        if not replica.available:
+            raise RuntimeError(f"replication lag {float(lag):.1f}s > {MAX_LAG_SECONDS}s")
+        return {"lag_seconds": round(float(lag), 3)}
+
+    async def session(self, prefer_replica: bool) -> AsyncSession:
+        """An open session on a healthy replica if allowed, else on the primary"""
+        if self.replicas:
+            candidates = [replica for replica in self.replicas if replica.available]
+            if not prefer_replica:
+                REPLICA_FALLBACKS.labels("sticky").inc()
+            elif not candidates:
+                REPLICA_FALLBACKS.labels("unavailable").inc()
+            else:
+                random.shuffle(candidates)
+                for replica in candidates:
+                    session = replica.sessionmaker()
+                    try:
+                        # Connect now, while falling back is still possible
+                        await session.connection()
+                    except (DBAPIError, OSError, TimeoutError):
+                        await session.close()
+                        replica.available = False
+                        REPLICA_FALLBACKS.labels("connect_failed").inc()
+                        continue
+                    READ_ROUTES.labels(replica.name).inc()
+                    return session
+        READ_ROUTES.labels("primary").inc()
+        return self.primary()
+
+
+replica_router = ReplicaRouter(replica_engines, async_session)
+_optional_bearer = HTTPBearer(auto_error=False)
+
+
+async def mark_write(redis: Redis, *user_ids: int):
+    """Pin these users' reads to the primary until replicas caught up"""
+    if not replica_router.replicas:
+        return
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.set(_sticky_key(user_id), "1", ex=STICKY_SECONDS)
+            await pipe.execute()
+    except RedisError:
+        # Readers then see their write once replication catches up
+        pass
+
+
+async def _may_use_replica(redis: Redis, credentials: HTTPAuthorizationCredentials | None) -> bool:
+    if not replica_router.replicas or credentials is None:
+        return True
+    try:
+        user_id, _ = token_identity(credentials)
+    except HTTPException:
+        # The auth dependency rejects the request
+        return True
+    try:
+        return not await redis.exists(_sticky_key(user_id))
+    except RedisError:
+        return False
+
+
+async def get_read_session(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_optional_bearer),
+    redis: Redis = Depends(get_redis),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Provide a read-only database session, on a replica where possible"""
+    session = await replica_router.session(await _may_use_replica(redis, credentials))
+    async with session:
+        yield session
+
+
+class LazyReadSession:
+    """Call to get the routed read session; nothing is checked out before that."""
+
+    def __init__(self, redis: Redis, credentials: HTTPAuthorizationCredentials | None):
+        self.redis = redis
+        self.credentials = credentials
+        self._session: AsyncSession | None = None
+
+    async def __call__(self) -> AsyncSession:
+        if self._session is None:
+            self._session = await replica_router.session(
+                await _may_use_replica(self.redis, self.credentials)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+async def get_lazy_read_session(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_optional_bearer),
+    redis: Redis = Depends(get_redis),
+) -> AsyncGenerator[LazyReadSession, None]:
+    """Provide a read session that is only opened if the endpoint asks for it"""
+    lazy = LazyReadSession(redis, credentials)
+    try:
+        yield lazy
+    finally:
+        await lazy.close()
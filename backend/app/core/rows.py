@@ -0,0 +1,62 @@
+"""
+ORM-free read path for the hot list endpoints.
+
+/doctors, /patients/* and /appointments/my select explicit columns with
+Core and serialize the row tuples straight to JSON bytes with orjson. No
+ORM instances are built (identity map, attribute instrumentation,
+relationship loaders) and nothing is re-validated through UserRead or
+AppointmentRead; the column lists are taken from those models, so the
+JSON document is the same. benchmarks/read_path.py compares both paths.
+"""
+
+from collections.abc import Iterable, Sequence
+
+import orjson
+from fastapi import Response
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.fields import USER_FIELDS, user_columns
+from app.models import Appointment, AppointmentRead, User
+
+APPOINTMENT_FIELDS = tuple(
+    name for name in AppointmentRead.model_fields if name not in ("doctor", "patient")
+)
+APPOINTMENT_COLUMNS = [getattr(Appointment, name) for name in APPOINTMENT_FIELDS]
+
+
+def as_dicts(rows: Iterable[Sequence], fields: tuple[str, ...]) -> list[dict]:
+    """Rows whose leading columns are fields; trailing (keyset) columns are dropped"""
+    return [dict(zip(fields, row, strict=False)) for row in rows]
+
+
+async def users_by_id(
+    session: AsyncSession, user_ids: set[int], fields: tuple[str, ...] = USER_FIELDS
+) -> dict[int, dict]:
+    if not user_ids:
+        return {}
+    statement = select(*user_columns(fields)).where(User.id.in_(user_ids))
+    return {user["id"]: user for user in as_dicts((await session.exec(statement)).all(), fields)}
+
+
+async def appointments_with_users(
+    session: AsyncSession, rows: Sequence[Sequence], fields: tuple[str, ...] = USER_FIELDS
+) -> list[dict]:
+    """Rows of APPOINTMENT_COLUMNS with their doctor and patient nested (one user query)"""
+    appointments = as_dicts(rows, APPOINTMENT_FIELDS)
+    user_ids = {a["doctor_id"] for a in appointments} | {a["patient_id"] for a in appointments}
+    users = await users_by_id(session, user_ids, fields)
+    for appointment in appointments:
+        appointment["doctor"] = users.get(appointment["doctor_id"])
+        appointment["patient"] = users.get(appointment["patient_id"])
+    return appointments
+
+
+def json_response(payload, response: Response) -> Response:
+    """
+    orjson-encoded response, returned directly so that the headers already
+    set on the injected response are carried over.
+    """
+    return Response(
+        content=orjson.dumps(payload), media_type="application/json", headers=dict(response.headers)
+    )
@@ -1,7 +1,18 @@
 import os
-from collections.abc import Generator
+import time
+from collections.abc import AsyncGenerator
+from uuid import uuid4
 
-from sqlmodel import Session, SQLModel, create_engine
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateIndex
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db_metrics import instrument_engine
+from app.models import APPOINTMENT_OVERLAP_CONSTRAINT, APPOINTMENT_SLOT_SQL
 
 DB_USER = os.getenv("POSTGRES_USER", "postgres")
 DB_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
@@ -9,16 +20,160 @@ DB_HOST = os.getenv("POSTGRES_HOST", "localhost")
 DB_PORT = os.getenv("POSTGRES_PORT", "5432")
 DB_NAME = os.getenv("POSTGRES_DB", "hospital_db")
 
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Streaming replicas for read-only endpoints: "host[:port],host[:port]"
+REPLICA_HOSTS = [h.strip() for h in os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",") if h.strip()]
+REPLICA_CONNECT_TIMEOUT = float(os.getenv("POSTGRES_REPLICA_CONNECT_TIMEOUT", "2"))
+
+# Per worker process and engine: size the pool so that
+# pods x workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Behind PgBouncer in transaction pooling mode: consecutive transactions may
+# run on different server connections, so no server-side prepared statements
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent checking out a database connection from the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10),
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ["pool"]
+)
+POOL_OVERFLOWS = Counter(
+    "db_pool_overflow_total", "Connections opened beyond DB_POOL_SIZE", ["pool"]
+)
+POOL_IN_USE = Gauge("db_pool_connections_in_use", "Database connections checked out", ["pool"])
+POOL_OVERFLOW_IN_USE = Gauge(
+    "db_pool_connections_overflow", "Open connections beyond DB_POOL_SIZE", ["pool"]
+)
+POOL_MAX = Gauge("db_pool_connections_max", "DB_POOL_SIZE + DB_MAX_OVERFLOW", ["pool"])
+
+
+def database_url(host: str = DB_HOST, port: str = DB_PORT) -> str:
+    return f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{host}:{port}/{DB_NAME}"
+
+
+DATABASE_URL = database_url()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout wait time, timeouts and overflow."""
+
+    @property
+    def metrics_name(self) -> str:
+        # The logging name survives recreate() (e.g. after a dispose)
+        return self._orig_logging_name or "primary"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.labels(self.metrics_name).inc()
+            raise
+        finally:
+            POOL_WAIT_SECONDS.labels(self.metrics_name).observe(time.perf_counter() - started)
+
+    def _inc_overflow(self) -> bool:
+        opened = super()._inc_overflow()
+        if opened and self._overflow > 0:
+            POOL_OVERFLOWS.labels(self.metrics_name).inc()
+        return opened
+
+
+def _create_engine(url: str, name: str, connect_args: dict | None = None) -> AsyncEngine:
+    connect_args = dict(connect_args or {})
+    if DB_PGBOUNCER:
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            # Unnamed statements would clash across clients sharing a server connection
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+    new_engine = create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_logging_name=name,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+    # SQLAlchemy keeps no counters of its own; these read the live pool,
+    # which engine.dispose() replaces
+    POOL_IN_USE.labels(name).set_function(lambda: new_engine.pool.checkedout())
+    POOL_OVERFLOW_IN_USE.labels(name).set_function(lambda: max(new_engine.pool.overflow(), 0))
+    POOL_MAX.labels(name).set(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # Per-request query cost and the slow-query log (instead of echoing all SQL)
+    instrument_engine(new_engine)
+    return new_engine
+
+
+engine = _create_engine(DATABASE_URL, "primary")
+
+# expire_on_commit=False: attributes stay loaded after commit, so response
+# serialization never triggers an implicit (blocking) refresh.
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def _replica_engine(replica: str) -> AsyncEngine:
+    host, _, port = replica.partition(":")
+    # A dead replica must fail fast so reads fall back to the primary
+    return _create_engine(
+        database_url(host, port or DB_PORT), replica, {"timeout": REPLICA_CONNECT_TIMEOUT}
+    )
+
+
+replica_engines = {replica: _replica_engine(replica) for replica in REPLICA_HOSTS}
+
+
+# create_all only creates missing tables; these bring tables created by
+# older versions up to date (idempotent).
+SCHEMA_UPGRADES = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    ALTER TABLE appointments ADD COLUMN IF NOT EXISTS slot tsrange
+        GENERATED ALWAYS AS ({APPOINTMENT_SLOT_SQL}) STORED
+    """,
+    f"""
+    DO $$
+    BEGIN
+        ALTER TABLE appointments ADD CONSTRAINT {APPOINTMENT_OVERLAP_CONSTRAINT}
+            EXCLUDE USING gist (doctor_id WITH =, slot WITH &&) WHERE (status = 'active');
+    EXCEPTION
+        WHEN duplicate_table OR duplicate_object THEN NULL;
+        -- Without the constraint nothing prevents double booking: refuse to start
+        WHEN exclusion_violation THEN
+            RAISE EXCEPTION '% cannot be added: existing active appointments overlap',
+                '{APPOINTMENT_OVERLAP_CONSTRAINT}'
+                USING HINT = 'Cancel one appointment of each overlapping pair '
+                    '(same doctor_id, overlapping slot, status active) and restart.';
+    END $$
+    """,
+]
 
-engine = create_engine(DATABASE_URL, echo=True)
 
-def create_db_and_tables():
+async def create_db_and_tables():
     """Create database tables"""
-    SQLModel.metadata.create_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
+        # create_all skips indexes of tables that already exist
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                await conn.execute(CreateIndex(index, if_not_exists=True))
 
 
-def get_session() -> Generator[Session, None, None]:
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """Provide a database session"""
-    with Session(engine) as session:
+    async with async_session() as session:
         yield session
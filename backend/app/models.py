@@ -1,9 +1,20 @@
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from enum import Enum
 
 from pydantic import EmailStr, validator
+from sqlalchemy import DDL, Column, Computed, Index, event, text
+from sqlalchemy.dialects.postgresql import TSRANGE, ExcludeConstraint
 from sqlmodel import Field, Relationship, SQLModel
 
+APPOINTMENT_DURATION = timedelta(hours=1)
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Convert to naive UTC; timestamp columns are stored without a zone."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
 
 # Enum definitions
 class UserRole(str, Enum):
@@ -22,6 +33,17 @@ class User(SQLModel, table=True):
     """User table."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Doctor listing and department facet counts
+        Index("ix_users_role_department", "role", "department"),
+        # Substring/prefix search on names (ILIKE '%q%'), needs pg_trgm
+        Index(
+            "ix_users_full_name_trgm",
+            "full_name",
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     email: str = Field(unique=True, index=True)
@@ -45,10 +67,19 @@ class User(SQLModel, table=True):
     )
 
 
+event.listen(User.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
 class Appointment(SQLModel, table=True):
     """Appointment table."""
 
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Doctor schedules and availability: doctor, active status, time range
+        Index("ix_appointments_doctor_status_start", "doctor_id", "status", "start_time"),
+        # A patient's list, paged by (start_time, id)
+        Index("ix_appointments_patient_start", "patient_id", "start_time", "id"),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     doctor_id: int = Field(foreign_key="users.id")
@@ -68,6 +99,35 @@ class Appointment(SQLModel, table=True):
     )
 
 
+# Double booking is prevented by Postgres itself: `slot` is a generated
+# [start, end) range and active slots of one doctor may not overlap. The
+# column is table-only (not mapped), so ORM inserts never write it.
+APPOINTMENT_SLOT_SQL = (
+    "tsrange(start_time, start_time + interval "
+    f"'{int(APPOINTMENT_DURATION.total_seconds() // 60)} minutes', '[)')"
+)
+APPOINTMENT_OVERLAP_CONSTRAINT = "appointments_no_overlap"
+
+Appointment.__table__.append_column(
+    Column("slot", TSRANGE, Computed(APPOINTMENT_SLOT_SQL, persisted=True), nullable=False)
+)
+Appointment.__table__.append_constraint(
+    ExcludeConstraint(
+        ("doctor_id", "="),
+        ("slot", "&&"),
+        name=APPOINTMENT_OVERLAP_CONSTRAINT,
+        using="gist",
+        where=text("status = 'active'"),
+    )
+)
+# btree_gist provides the GiST equality operator for the integer doctor_id
+event.listen(
+    Appointment.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist"),
+)
+
+
 # Pydantic schemas
 class UserBase(SQLModel):
     email: EmailStr
@@ -122,6 +182,27 @@ class UserCreate(UserBase):
         return v.lower().strip()
 
 
+class DoctorImport(UserBase):
+    """One row of a bulk doctor import (same rules as add_doctor.py)."""
+
+    password: str = Field(min_length=6)
+    department: str | None = None
+    phone: str | None = None
+    age: int | None = None
+    gender: str | None = None
+
+    @validator("full_name")
+    def validate_full_name(cls, v):
+        v = v.strip()
+        if not v:
+            raise ValueError("Ad soyad boş olamaz")
+        return v
+
+    @validator("email")
+    def validate_email(cls, v):
+        return v.lower().strip()
+
+
 class UserLogin(SQLModel):
     """User login schema."""
 
@@ -155,7 +236,8 @@ class AppointmentCreate(SQLModel):
         appointment_time = v if v.tzinfo is not None else v.replace(tzinfo=UTC)
         if appointment_time < now:
             raise ValueError("Appointment time cannot be in the past")
-        return v
+        # start_time is a naive UTC column; asyncpg rejects aware datetimes for it
+        return naive_utc(appointment_time)
 
 
 class AppointmentRead(SQLModel):
@@ -172,6 +254,21 @@ class AppointmentRead(SQLModel):
     patient: UserRead | None = None
 
 
+class DoctorAvailability(SQLModel):
+    """Free appointment slots of a doctor."""
+
+    doctor_id: int
+    duration_minutes: int
+    slots: list[datetime]
+
+
+class FirstAvailableDoctor(SQLModel):
+    """Earliest free slot of a doctor."""
+
+    doctor: UserRead
+    first_slot: datetime
+
+
 class Token(SQLModel):
     """JWT token schema."""
 
@@ -0,0 +1,194 @@
+"""
+Doctor availability engine.
+
+Busy time is kept per doctor per (UTC) day as a small interval index in a
+Redis hash: field = appointment id, value = "start:end" in minutes from
+midnight. Booking adds a field and cancellation removes one, so the cache
+is maintained incrementally and stays exact even when intervals share a
+minute. A sentinel field marks a day as fully built from the database;
+days without it are rebuilt on read. A rebuild writes back what it read
+from the database, which may include an appointment cancelled in the
+meantime, so cancellation also leaves a tombstone field ("-<id>") that
+hides the interval whatever is written afterwards (ids are never reused).
+
+Free slots are derived in-process from a 1440-bit minute bitmap of each
+day, which makes every slot test a single AND.
+"""
+
+import math
+import os
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import APPOINTMENT_DURATION, Appointment, AppointmentStatus
+
+DAY_START_HOUR = int(os.getenv("AVAILABILITY_DAY_START_HOUR", "9"))
+DAY_END_HOUR = int(os.getenv("AVAILABILITY_DAY_END_HOUR", "17"))
+SLOT_MINUTES = int(os.getenv("AVAILABILITY_SLOT_MINUTES", "30"))
+CACHE_TTL_SECONDS = int(os.getenv("AVAILABILITY_CACHE_TTL", "3600"))
+MAX_RANGE_DAYS = 31
+DEFAULT_RANGE = timedelta(days=6)
+
+_BUILT = "_built"
+_CANCELLED = "-"
+_DURATION_MINUTES = int(APPOINTMENT_DURATION.total_seconds() // 60)
+_SLOT_MASK = (1 << _DURATION_MINUTES) - 1
+
+Interval = tuple[int, int]
+
+
+def _key(doctor_id: int, day: date) -> str:
+    return f"availability:{doctor_id}:{day.isoformat()}"
+
+
+def _day_intervals(start_time: datetime) -> list[tuple[date, Interval]]:
+    """Split an appointment into per-day minute intervals (it may cross midnight)"""
+    end_time = start_time + APPOINTMENT_DURATION
+    parts = []
+    day = start_time.date()
+    while datetime.combine(day, time()) < end_time:
+        midnight = datetime.combine(day, time())
+        start = max(0, int((start_time - midnight).total_seconds() // 60))
+        end = min(24 * 60, math.ceil((end_time - midnight).total_seconds() / 60))
+        parts.append((day, (start, end)))
+        day += timedelta(days=1)
+    return parts
+
+
+def busy_bitmap(intervals: list[Interval]) -> int:
+    """Minute bitmap of a day: bit m is set when minute m is booked"""
+    bitmap = 0
+    for start, end in intervals:
+        bitmap |= ((1 << (end - start)) - 1) << start
+    return bitmap
+
+
+def free_slots(day: date, intervals: list[Interval], not_before: datetime) -> list[datetime]:
+    """Slot starts within working hours that fit a whole appointment"""
+    bitmap = busy_bitmap(intervals)
+    midnight = datetime.combine(day, time())
+    slots = []
+    last_start = DAY_END_HOUR * 60 - _DURATION_MINUTES
+    for minute in range(DAY_START_HOUR * 60, last_start + 1, SLOT_MINUTES):
+        slot = midnight + timedelta(minutes=minute)
+        if slot >= not_before and not bitmap & (_SLOT_MASK << minute):
+            slots.append(slot)
+    return slots
+
+
+def busy_statement(doctor_ids: list[int], range_start: datetime, range_end: datetime):
+    """Active appointments of the doctors starting in [range_start, range_end)"""
+    return select(Appointment.id, Appointment.doctor_id, Appointment.start_time).where(
+        Appointment.doctor_id.in_(doctor_ids),
+        Appointment.status == AppointmentStatus.active,
+        Appointment.start_time >= range_start,
+        Appointment.start_time < range_end,
+    )
+
+
+async def _load_from_db(
+    session: AsyncSession, doctor_ids: list[int], days: list[date]
+) -> dict[tuple[int, date], dict[str, str]]:
+    """One query for all missing doctor-days, grouped into interval indexes"""
+    wanted = set(days)
+    range_start = datetime.combine(min(days), time()) - APPOINTMENT_DURATION
+    range_end = datetime.combine(max(days) + timedelta(days=1), time())
+    rows = (await session.exec(busy_statement(doctor_ids, range_start, range_end))).all()
+
+    indexes: dict[tuple[int, date], dict[str, str]] = defaultdict(dict)
+    for appointment_id, doctor_id, start_time in rows:
+        for day, (start, end) in _day_intervals(start_time):
+            if day in wanted:
+                indexes[(doctor_id, day)][str(appointment_id)] = f"{start}:{end}"
+    return indexes
+
+
+async def get_busy_intervals(
+    session: AsyncSession, redis: Redis, doctor_ids: list[int], days: list[date]
+) -> dict[tuple[int, date], list[Interval]]:
+    """Busy intervals per doctor-day, from Redis where built, else from the database"""
+    keys = [(doctor_id, day) for doctor_id in doctor_ids for day in days]
+    cached: dict[tuple[int, date], dict[str, str]] = {}
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for doctor_id, day in keys:
+                pipe.hgetall(_key(doctor_id, day))
+            for key, index in zip(keys, await pipe.execute(), strict=True):
+                if _BUILT in index:
+                    cached[key] = index
+        redis_ok = True
+    except RedisError:
+        redis_ok = False
+
+    missing = [key for key in keys if key not in cached]
+    if missing:
+        loaded = await _load_from_db(
+            session,
+            sorted({doctor_id for doctor_id, _ in missing}),
+            sorted({day for _, day in missing}),
+        )
+        for key in missing:
+            cached[key] = loaded.get(key, {})
+        if redis_ok:
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for doctor_id, day in missing:
+                        # HSET merges: a booking recorded meanwhile is kept, and a
+                        # cancellation's tombstone hides what it re-adds
+                        pipe.hset(_key(doctor_id, day), mapping={_BUILT: "1", **cached[(doctor_id, day)]})
+                        pipe.expire(_key(doctor_id, day), CACHE_TTL_SECONDS)
+                    await pipe.execute()
+            except RedisError:
+                pass
+
+    result = {}
+    for key, index in cached.items():
+        cancelled = {field[len(_CANCELLED) :] for field in index if field.startswith(_CANCELLED)}
+        result[key] = [
+            tuple(int(m) for m in value.split(":"))
+            for field, value in index.items()
+            if field != _BUILT and not field.startswith(_CANCELLED) and field not in cancelled
+        ]
+    return result
+
+
+async def record_booking(redis: Redis, appointment: Appointment):
+    """Add a new active appointment to the cached day indexes"""
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for day, (start, end) in _day_intervals(appointment.start_time):
+                pipe.hset(_key(appointment.doctor_id, day), str(appointment.id), f"{start}:{end}")
+                pipe.expire(_key(appointment.doctor_id, day), CACHE_TTL_SECONDS)
+            await pipe.execute()
+    except RedisError:
+        pass
+
+
+async def record_cancellation(redis: Redis, appointment: Appointment):
+    """Remove a cancelled appointment from the cached day indexes"""
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for day, _ in _day_intervals(appointment.start_time):
+                key = _key(appointment.doctor_id, day)
+                pipe.hdel(key, str(appointment.id))
+                # Also for a day being rebuilt from a read taken before the cancel
+                pipe.hset(key, f"{_CANCELLED}{appointment.id}", "")
+                pipe.expire(key, CACHE_TTL_SECONDS)
+            await pipe.execute()
+    except RedisError:
+        # A stale busy interval only hides a slot until the day expires
+        pass
+
+
+def date_range(start: date, end: date) -> list[date]:
+    """Inclusive list of days, bounded by MAX_RANGE_DAYS"""
+    if end < start:
+        raise ValueError("'to' must not be before 'from'")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise ValueError(f"Date range cannot exceed {MAX_RANGE_DAYS} days")
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
@@ -0,0 +1,151 @@
+"""
+Bulk doctor import.
+
+Rows from a CSV or JSONL file are validated in-process. Their passwords are
+hashed in parallel on the caller's executor (the CLI brings a process pool
+sized to the machine, so the request-path password pool is left alone). Emails are checked against the
+users table with one set-based query, and all new doctors are written by
+multi-row INSERT ... ON CONFLICT DO NOTHING statements in one transaction.
+Every rejected row is reported with its line number and reason.
+"""
+
+import asyncio
+import csv
+import json
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from pydantic import ValidationError
+from sqlalchemy import ARRAY, String, any_, bindparam
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth import hash_password
+from app.models import DoctorImport, User, UserRole
+
+# asyncpg allows 32767 bind parameters per statement
+INSERT_BATCH_SIZE = 1000
+
+
+@dataclass
+class RowError:
+    line: int
+    email: str | None
+    message: str
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    errors: list[RowError] = field(default_factory=list)
+
+
+def read_rows(path: Path) -> list[tuple[int, dict]]:
+    """(line number, raw row) pairs from a .csv or .jsonl file"""
+    with path.open(encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(f)
+            # Empty cells are missing values, not empty strings
+            return [
+                (reader.line_num, {key: value or None for key, value in row.items()})
+                for row in reader
+            ]
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            rows = []
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        row = {"_error": f"Geçersiz JSON: {e.msg}"}
+                    if not isinstance(row, dict):
+                        row = {"_error": "Satır bir JSON nesnesi olmalı"}
+                    rows.append((line_number, row))
+            return rows
+    raise ValueError(f"Desteklenmeyen dosya türü: {path.suffix} (.csv veya .jsonl)")
+
+
+def _validate(rows: list[tuple[int, dict]], report: ImportReport) -> list[tuple[int, DoctorImport]]:
+    valid = []
+    seen: set[str] = set()
+    for line, raw in rows:
+        if "_error" in raw:
+            report.errors.append(RowError(line, None, raw["_error"]))
+            continue
+        try:
+            doctor = DoctorImport.model_validate(raw)
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+            )
+            report.errors.append(RowError(line, raw.get("email"), message))
+            continue
+        if doctor.email in seen:
+            report.errors.append(RowError(line, doctor.email, "Email dosyada birden fazla kez geçiyor"))
+            continue
+        seen.add(doctor.email)
+        valid.append((line, doctor))
+    return valid
+
+
+async def import_doctors(
+    session: AsyncSession, rows: list[tuple[int, dict]], executor: Executor
+) -> ImportReport:
+    """Insert all valid, new doctors in one transaction and report the rest"""
+    report = ImportReport()
+    valid = _validate(rows, report)
+    if not valid:
+        return report
+
+    existing = set(
+        (
+            await session.exec(
+                select(User.email).where(
+                    User.email == any_(bindparam("emails", [d.email for _, d in valid], type_=ARRAY(String)))
+                )
+            )
+        ).all()
+    )
+    new = []
+    for line, doctor in valid:
+        if doctor.email in existing:
+            report.errors.append(RowError(line, doctor.email, "Email zaten kayıtlı"))
+        else:
+            new.append((line, doctor))
+    if not new:
+        return report
+
+    # bcrypt dominates: spread it over the executor's processes
+    loop = asyncio.get_running_loop()
+    hashes = await asyncio.gather(
+        *(loop.run_in_executor(executor, hash_password, doctor.password) for _, doctor in new)
+    )
+    values = [
+        {
+            **doctor.model_dump(exclude={"password"}),
+            "password_hash": password_hash,
+            "role": UserRole.doctor,
+        }
+        for (_, doctor), password_hash in zip(new, hashes, strict=True)
+    ]
+
+    inserted: set[str] = set()
+    for start in range(0, len(values), INSERT_BATCH_SIZE):
+        statement = (
+            insert(User)
+            .values(values[start : start + INSERT_BATCH_SIZE])
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email)
+        )
+        inserted.update((await session.exec(statement)).scalars())
+    await session.commit()
+
+    report.inserted = len(inserted)
+    for line, doctor in new:
+        if doctor.email not in inserted:
+            # Registered concurrently, after the existence check
+            report.errors.append(RowError(line, doctor.email, "Email zaten kayıtlı"))
+    report.errors.sort(key=lambda error: error.line)
+    return report
@@ -0,0 +1,92 @@
+"""
+Versioned doctor roster cache.
+
+The roster changes a few times a month, so each worker keeps the rendered
+/doctors body in memory together with the roster version it was built
+from. The version is a Redis counter bumped after every doctor insert or
+update (API, seeding, add_doctor.py), which makes every worker in every
+pod reload on its next request. Without Redis the roster is simply
+rebuilt per request.
+"""
+
+import hashlib
+from collections import Counter
+from dataclasses import dataclass, field
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.fields import USER_FIELDS, user_columns
+from app.core.rows import as_dicts
+from app.models import User, UserRole
+
+VERSION_KEY = "doctors:roster:version"
+
+
+def _etag(body: bytes) -> str:
+    # Content hash: identical rosters get identical strong ETags on every worker
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def _render(doctors: list[dict]) -> bytes:
+    return orjson.dumps(doctors)
+
+
+@dataclass(frozen=True)
+class RosterSnapshot:
+    version: int | None
+    body: bytes
+    etag: str
+    department_counts: dict[str, int]
+    doctors: list[dict] = field(default_factory=list)
+    _projections: dict = field(default_factory=dict, compare=False, repr=False)
+
+    def projected(self, fields: tuple[str, ...]) -> tuple[bytes, str]:
+        """(body, etag) of the roster trimmed to fields, cached with the snapshot"""
+        if fields not in self._projections:
+            body = _render([{name: doctor[name] for name in fields} for doctor in self.doctors])
+            self._projections[fields] = (body, _etag(body))
+        return self._projections[fields]
+
+
+_snapshot: RosterSnapshot | None = None
+
+
+async def _current_version(redis: Redis) -> int | None:
+    try:
+        return int(await redis.get(VERSION_KEY) or 0)
+    except RedisError:
+        return None
+
+
+async def get_roster(session: AsyncSession, redis: Redis) -> RosterSnapshot:
+    """The rendered roster, reloaded only when the shared version moved"""
+    global _snapshot
+    version = await _current_version(redis)
+    if version is not None and _snapshot is not None and _snapshot.version == version:
+        return _snapshot
+
+    statement = select(*user_columns()).where(User.role == UserRole.doctor).order_by(User.id)
+    doctors = as_dicts((await session.exec(statement)).all(), USER_FIELDS)
+    body = _render(doctors)
+    snapshot = RosterSnapshot(
+        version,
+        body,
+        _etag(body),
+        dict(Counter(doctor["department"] or "" for doctor in doctors)),
+        doctors,
+    )
+    if version is not None:
+        _snapshot = snapshot
+    return snapshot
+
+
+async def bump_version(redis: Redis):
+    """Invalidate every worker's roster; call after committing a doctor write"""
+    try:
+        await redis.incr(VERSION_KEY)
+    except RedisError:
+        pass
@@ -0,0 +1,108 @@
+"""
+Triage priority queue.
+
+Patients are kept in a Redis sorted set scored from their age and the
+conditions in their medical history. Scores are written when a profile is
+registered or updated, so reading the top-N is a single ZREVRANGE
+(O(log n + N)) instead of a scan of the users table. The set is rebuilt
+from the database when its marker key is missing (first use, Redis flush,
+reseed).
+"""
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import User, UserRead, UserRole
+
+QUEUE_KEY = "triage:priority"
+BUILT_KEY = "triage:priority:built"
+
+# Matched case-insensitively as substrings of medical_history
+CONDITION_WEIGHTS = {
+    "chest pain": 100,
+    "stroke": 100,
+    "shortness of breath": 80,
+    "severe headache": 70,
+    "fever": 40,
+    "hypertension": 20,
+    "diabetes": 20,
+    "asthma": 15,
+    "high cholesterol": 10,
+}
+ELDERLY_AGE = 65
+CHILD_AGE = 5
+
+
+def priority_score(age: int | None, medical_history: str | None) -> float:
+    """Condition weights plus an age factor; 0 means not in the queue"""
+    history = (medical_history or "").lower()
+    score = float(sum(weight for condition, weight in CONDITION_WEIGHTS.items() if condition in history))
+    if score == 0:
+        return 0.0
+    if age is not None:
+        if age >= ELDERLY_AGE:
+            score += 30 + (age - ELDERLY_AGE)
+        elif age < CHILD_AGE:
+            score += 25
+        else:
+            score += age / 10
+    return score
+
+
+async def update_patient(redis: Redis, user: User | UserRead):
+    """Re-score one patient after a profile write"""
+    if user.role != UserRole.patient:
+        return
+    score = priority_score(user.age, user.medical_history)
+    try:
+        if score > 0:
+            await redis.zadd(QUEUE_KEY, {str(user.id): score})
+        else:
+            await redis.zrem(QUEUE_KEY, str(user.id))
+    except RedisError:
+        # The next rebuild picks the change up
+        await reset(redis)
+
+
+async def reset(redis: Redis):
+    """Force a rebuild on next read"""
+    try:
+        await redis.delete(BUILT_KEY)
+    except RedisError:
+        pass
+
+
+async def rebuild(session: AsyncSession, redis: Redis):
+    """Recompute the whole queue from the users table"""
+    rows = (
+        await session.exec(
+            select(User.id, User.age, User.medical_history).where(User.role == UserRole.patient)
+        )
+    ).all()
+    scores = {str(user_id): priority_score(age, history) for user_id, age, history in rows}
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(QUEUE_KEY)
+        positive = {member: score for member, score in scores.items() if score > 0}
+        if positive:
+            pipe.zadd(QUEUE_KEY, positive)
+        pipe.set(BUILT_KEY, "1")
+        await pipe.execute()
+
+
+async def top_patient_ids(session: AsyncSession, redis: Redis, limit: int) -> list[int]:
+    """Ids of the highest-priority patients, highest first"""
+    try:
+        if not await redis.exists(BUILT_KEY):
+            await rebuild(session, redis)
+        return [int(member) for member in await redis.zrevrange(QUEUE_KEY, 0, limit - 1)]
+    except RedisError:
+        # Degraded mode: score in-process
+        rows = (
+            await session.exec(
+                select(User.id, User.age, User.medical_history).where(User.role == UserRole.patient)
+            )
+        ).all()
+        scored = [(priority_score(age, history), user_id) for user_id, age, history in rows]
+        return [user_id for score, user_id in sorted(scored, reverse=True) if score > 0][:limit]
@@ -0,0 +1,96 @@
+"""
+Shared test doubles.
+"""
+
+from collections import namedtuple
+from collections.abc import Callable
+
+import pytest
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression
+
+from app.models import User, UserRole
+
+
+class _Result:
+    def __init__(self, rows: list):
+        self.rows = rows
+
+    def all(self) -> list:
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+
+
+def _requested_ids(statement) -> set | None:
+    """Ids of an `id = x` or `id IN (...)` lookup; None for any other statement"""
+    criterion = statement.whereclause
+    if not isinstance(criterion, BinaryExpression) or getattr(criterion.left, "key", None) != "id":
+        return None
+    if criterion.operator is operators.in_op:
+        return set(criterion.right.effective_value)
+    if criterion.operator is operators.eq:
+        return {criterion.right.effective_value}
+    return None
+
+
+class FakeSession:
+    """
+    Stand-in for an AsyncSession that answers column SELECTs from the
+    objects of the selected table. Lookups by id are narrowed to those ids;
+    any other filter, ordering or limit is not evaluated, so tests give it
+    the rows the real query would return (SQL behaviour is covered by the
+    TEST_DATABASE_URL tests). Every executed statement is recorded.
+    """
+
+    bind = None
+
+    def __init__(self, **tables: list):
+        self.tables = tables
+        self.statements = []
+
+    async def exec(self, statement) -> _Result:
+        self.statements.append(statement)
+        columns = list(statement.selected_columns)
+        objects = self.tables[columns[0].table.name]
+        ids = _requested_ids(statement)
+        if ids is not None:
+            objects = [o for o in objects if o.id in ids]
+        Row = namedtuple("Row", [column.key for column in columns])
+        return _Result([Row(*(getattr(o, column.key) for column in columns)) for o in objects])
+
+    async def stream(self, statement) -> _Result:
+        return await self.exec(statement)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+@pytest.fixture
+def fake_session() -> Callable[..., FakeSession]:
+    """FakeSession(users=[...], appointments=[...])"""
+    return FakeSession
+
+
+@pytest.fixture
+def make_user() -> Callable[..., User]:
+    def make(user_id: int, role: UserRole = UserRole.patient, **fields) -> User:
+        defaults = {
+            "email": f"user{user_id}@hospital.com",
+            "password_hash": "x",
+            "full_name": f"User {user_id}",
+        }
+        return User(id=user_id, role=role, **{**defaults, **fields})
+
+    return make
@@ -0,0 +1,47 @@
+"""
+Tests for the API latency benchmark harness.
+"""
+
+import random
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+
+from benchmarks.api_latency import Context, compare, run_scenario
+
+
+@pytest.mark.asyncio
+async def test_run_scenario_counts_expected_statuses_only():
+    """Test that unexpected statuses are errors and expected ones are timed."""
+    app = FastAPI()
+    calls = []
+
+    @app.get("/flaky")
+    async def flaky():
+        calls.append(1)
+        return Response(status_code=500) if len(calls) % 4 == 0 else {}
+
+    async def scenario(client, ctx):
+        return await client.get("/flaky")
+
+    ctx = Context("p", "d", [1], random.Random(1))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+        row = await run_scenario(client, ctx, scenario, {200}, requests=40, concurrency=4, warmup=0)
+
+    assert len(calls) == 40
+    assert row["errors"] == {"500": 10}
+    assert row["rps"] > 0 and row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    """Test the baseline comparison against the tolerance."""
+    baseline = {"doctors": {"p95_ms": 10.0, "rps": 100.0}, "login": {"p95_ms": 50.0, "rps": 20.0}}
+    results = {
+        "doctors": {"p95_ms": 11.0, "rps": 95.0},
+        "login": {"p95_ms": 70.0, "rps": 10.0},
+        "priority": {"p95_ms": 5.0, "rps": 300.0},
+    }
+    regressions = compare(results, baseline, tolerance=0.2)
+    assert len(regressions) == 2
+    assert all(line.startswith("login:") for line in regressions)
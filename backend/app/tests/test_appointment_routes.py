@@ -0,0 +1,67 @@
+"""
+Tests for opt-in paging of /appointments/my.
+"""
+
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.dialects import postgresql
+
+from app.api import appointment_routes
+from app.auth import get_current_principal
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.redis import MEMORY_URL, create_redis, get_redis
+from app.core.replicas import get_read_session
+from app.models import Appointment, AppointmentStatus, UserRead, UserRole
+
+
+@pytest.fixture
+async def my_appointments(make_user, fake_session):
+    doctor, patient = make_user(1, UserRole.doctor), make_user(2)
+    start = datetime(2020, 1, 6, 9)
+    appointments = [
+        Appointment(
+            id=i, doctor_id=1, patient_id=2, start_time=start + timedelta(days=i),
+            status=AppointmentStatus.active,
+        )
+        for i in range(1, 4)
+    ]
+    session = fake_session(appointments=appointments, users=[doctor, patient])
+
+    redis = create_redis(MEMORY_URL)
+    await redis.flushall()
+    app = FastAPI()
+    app.include_router(appointment_routes.router)
+    app.dependency_overrides[get_redis] = lambda: redis
+    app.dependency_overrides[get_read_session] = lambda: session
+    app.dependency_overrides[get_current_principal] = lambda: UserRead.model_validate(patient)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client, session
+    await redis.aclose()
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_unpaged_request_returns_the_whole_list(my_appointments):
+    """Test that clients that never send limit or cursor are not truncated."""
+    client, session = my_appointments
+    response = await client.get("/appointments/my")
+    assert response.status_code == 200
+    assert [a["id"] for a in response.json()] == [1, 2, 3]
+    assert NEXT_CURSOR_HEADER not in response.headers
+    assert "LIMIT" not in _sql(session.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_limit_opts_into_paging(my_appointments):
+    """Test that limit= pages the list and hands out the next cursor."""
+    client, session = my_appointments
+    response = await client.get("/appointments/my", params={"limit": 2})
+    assert [a["id"] for a in response.json()] == [1, 2]
+    assert NEXT_CURSOR_HEADER in response.headers
+    assert "LIMIT" in _sql(session.statements[0])
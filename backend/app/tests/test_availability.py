@@ -0,0 +1,77 @@
+"""
+Tests for the doctor availability engine.
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from app.core.redis import MEMORY_URL, create_redis
+from app.models import Appointment, AppointmentStatus
+from app.services import availability
+
+
+def test_appointment_split_across_midnight():
+    """Test that an appointment crossing midnight is indexed under both days."""
+    parts = availability._day_intervals(datetime(2025, 3, 1, 23, 30))
+    assert parts == [
+        (date(2025, 3, 1), (23 * 60 + 30, 24 * 60)),
+        (date(2025, 3, 2), (0, 30)),
+    ]
+
+
+def test_free_slots_skip_booked_time():
+    """Test that slots overlapping a booking are removed, back-to-back ones kept."""
+    day = date(2025, 3, 1)
+    booked = availability._day_intervals(datetime(2025, 3, 1, 10, 0))[0][1]
+    slots = availability.free_slots(day, [booked], not_before=datetime(2025, 1, 1))
+
+    assert datetime(2025, 3, 1, 9, 0) in slots
+    assert datetime(2025, 3, 1, 9, 30) not in slots
+    assert datetime(2025, 3, 1, 10, 0) not in slots
+    assert datetime(2025, 3, 1, 10, 30) not in slots
+    assert datetime(2025, 3, 1, 11, 0) in slots
+
+
+def test_free_slots_exclude_the_past():
+    """Test that slots before not_before are not offered."""
+    day = date(2025, 3, 1)
+    slots = availability.free_slots(day, [], not_before=datetime(2025, 3, 1, 12, 0))
+    assert slots[0] == datetime(2025, 3, 1, 12, 0)
+
+
+def test_date_range_is_bounded():
+    """Test that inverted or oversized ranges are rejected."""
+    assert len(availability.date_range(date(2025, 3, 1), date(2025, 3, 7))) == 7
+    with pytest.raises(ValueError):
+        availability.date_range(date(2025, 3, 7), date(2025, 3, 1))
+    with pytest.raises(ValueError):
+        availability.date_range(date(2025, 1, 1), date(2025, 3, 1))
+
+
+@pytest.mark.asyncio
+async def test_cancellation_during_a_rebuild_is_not_written_back(fake_session):
+    """Test that a day rebuilt from a read taken before a cancel keeps the slot free."""
+    redis = create_redis(MEMORY_URL)
+    await redis.flushall()
+    day = date(2025, 3, 3)
+    appointment = Appointment(
+        id=7, doctor_id=1, patient_id=2, start_time=datetime(2025, 3, 3, 10),
+        status=AppointmentStatus.active,
+    )
+
+    class _CancelledDuringRead(fake_session):
+        async def exec(self, statement):
+            result = await super().exec(statement)
+            # Cancelled after the database read, before the cache write-back
+            await availability.record_cancellation(redis, appointment)
+            return result
+
+    session = _CancelledDuringRead(appointments=[appointment])
+    first = await availability.get_busy_intervals(session, redis, [1], [day])
+    assert first[(1, day)] == [(600, 660)]
+
+    cached = await availability.get_busy_intervals(session, redis, [1], [day])
+    assert cached[(1, day)] == []
+    assert len(session.statements) == 1
+    await redis.aclose()
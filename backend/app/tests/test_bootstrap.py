@@ -0,0 +1,23 @@
+"""
+Tests for single-flight startup.
+"""
+
+from app.core import bootstrap
+
+
+def test_schema_fingerprint_tracks_the_expected_ddl(monkeypatch):
+    """Test that the fingerprint is stable and changes with a schema upgrade."""
+    fingerprint = bootstrap.schema_fingerprint()
+    assert fingerprint == bootstrap.schema_fingerprint()
+
+    monkeypatch.setattr(
+        bootstrap, "SCHEMA_UPGRADES", [*bootstrap.SCHEMA_UPGRADES, "CREATE INDEX new_ix ON users (age)"]
+    )
+    assert bootstrap.schema_fingerprint() != fingerprint
+
+
+def test_seed_accounts_are_unique():
+    """Test the seed roster: 8 doctors, 7 patients, no duplicate emails."""
+    emails = [user["email"] for user in bootstrap.SEED_DOCTORS + bootstrap.SEED_PATIENTS]
+    assert (len(bootstrap.SEED_DOCTORS), len(bootstrap.SEED_PATIENTS)) == (8, 7)
+    assert len(set(emails)) == len(emails)
@@ -0,0 +1,49 @@
+"""
+Tests for the synthetic dataset generator.
+"""
+
+import random
+from datetime import date
+
+from benchmarks import datagen
+
+
+def _appointments(seed: int) -> list[tuple]:
+    return list(
+        datagen.appointment_rows(
+            random.Random(seed), range(1, 21), range(21, 521), date(2025, 3, 3), 14, 5.0, 0.1
+        )
+    )
+
+
+def test_generation_is_reproducible_from_the_seed():
+    """Test that the same seed yields the same rows and another seed does not."""
+    assert _appointments(1) == _appointments(1)
+    assert _appointments(1) != _appointments(2)
+    patients = list(datagen.patient_rows(random.Random(1), 21, 50, "hash"))
+    assert patients == list(datagen.patient_rows(random.Random(1), 21, 50, "hash"))
+    assert [row[0] for row in patients] == list(range(21, 71))
+
+
+def test_appointments_fit_the_schedule_without_overlaps():
+    """Test working-day, working-hour slots that never double-book a doctor."""
+    rows = _appointments(3)
+    assert rows
+    slots = [(doctor_id, start) for doctor_id, _, start, _, _, _ in rows]
+    assert len(slots) == len(set(slots))
+    for doctor_id, patient_id, start, status, _, _ in rows:
+        assert start.weekday() < 5
+        assert 9 <= start.hour < 17
+        assert 1 <= doctor_id <= 20 and 21 <= patient_id <= 520
+        assert status in ("active", "cancelled")
+
+
+def test_truncate_restores_the_seed_accounts():
+    """Test that the benchmark logins come back as users rows after --truncate."""
+    rows = list(datagen.seed_rows("doctor-hash", "patient-hash"))
+    by_email = {row[1]: dict(zip(datagen.USER_COLUMNS, row, strict=True)) for row in rows}
+    assert [row[0] for row in rows] == list(range(1, len(rows) + 1))
+    assert by_email["sarah.chen@hospital.com"]["role"] == "doctor"
+    assert by_email["sarah.chen@hospital.com"]["password_hash"] == "doctor-hash"
+    assert by_email["patient@hospital.com"]["role"] == "patient"
+    assert by_email["patient@hospital.com"]["medical_history"] == "Hypertension, Type 2 Diabetes"
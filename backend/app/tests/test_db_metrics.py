@@ -0,0 +1,75 @@
+"""
+Tests for per-request database cost instrumentation.
+"""
+
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core import db_metrics
+from app.core.db_metrics import DBCostMiddleware, instrument_engine, track_queries
+
+engine = create_engine("sqlite://")
+instrument_engine(engine)
+
+
+def _select_rows(count: int):
+    with engine.connect() as conn:
+        for _ in range(count):
+            conn.execute(text("SELECT 1 UNION ALL SELECT 2")).all()
+
+
+def test_queries_are_counted_inside_the_tracked_block():
+    """Test that statements are attributed only to the active tracker."""
+    _select_rows(1)
+    with track_queries() as stats:
+        _select_rows(3)
+    assert stats.queries == 3
+    assert stats.seconds > 0
+    assert stats.statements.most_common(1)[0][1] == 3
+
+
+def test_failed_statements_leave_no_state_on_the_connection():
+    """Test that a statement that raises does not leave its start time behind."""
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        with track_queries() as stats:
+            conn.execute(text("SELECT 1")).all()
+        assert not any(key.startswith("query") for key in conn.info)
+    assert stats.queries == 1
+    assert 0 < stats.seconds < 1
+
+
+def test_slow_queries_are_logged(monkeypatch, caplog):
+    """Test that statements above the threshold reach the slow-query log."""
+    monkeypatch.setattr(db_metrics, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger=db_metrics.__name__):
+        _select_rows(1)
+    assert "Slow query" in caplog.text
+
+
+def test_middleware_reports_cost_and_flags_n_plus_one(monkeypatch, caplog):
+    """Test the Server-Timing header and the N+1 warning for a chatty route."""
+    monkeypatch.setattr(db_metrics, "N_PLUS_ONE_THRESHOLD", 2)
+    app = FastAPI()
+    app.add_middleware(DBCostMiddleware)
+
+    @app.get("/items/{count}")
+    def items(count: int):
+        _select_rows(count)
+        return {}
+
+    client = TestClient(app)
+    with caplog.at_level(logging.WARNING, logger=db_metrics.__name__):
+        response = client.get("/items/2")
+        assert 'desc="2 queries' in response.headers["Server-Timing"]
+        assert "N+1" not in caplog.text
+
+        client.get("/items/5")
+    assert "GET /items/{count} ran 5 queries (possible N+1)" in caplog.text
@@ -0,0 +1,51 @@
+"""
+Tests for the instrumented database connection pool.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from app import database
+from app.database import InstrumentedPool
+
+
+def _sample(name: str) -> float | None:
+    return REGISTRY.get_sample_value(name, {"pool": "test"})
+
+
+@pytest.mark.asyncio
+async def test_pool_records_waits_overflow_and_timeouts():
+    """Test checkout metrics for a pool of one plus one overflow connection."""
+    pool = InstrumentedPool(MagicMock, pool_size=1, max_overflow=1, timeout=0.01, logging_name="test")
+
+    def exhaust():
+        held = [pool.connect(), pool.connect()]
+        with pytest.raises(exc.TimeoutError):
+            pool.connect()
+        for connection in held:
+            connection.close()
+
+    await greenlet_spawn(exhaust)
+    assert _sample("db_pool_wait_seconds_count") == 3
+    assert _sample("db_pool_overflow_total") == 1
+    assert _sample("db_pool_checkout_timeouts_total") == 1
+
+    # The metrics name survives dispose()
+    assert pool.recreate().metrics_name == "test"
+
+
+def test_engines_use_the_configured_pool():
+    """Test that the primary engine gets the env-configured pool."""
+    pool = database.engine.pool
+    assert isinstance(pool, InstrumentedPool)
+    assert pool.metrics_name == "primary"
+    assert (pool.size(), pool._max_overflow, pool._timeout) == (
+        database.DB_POOL_SIZE,
+        database.DB_MAX_OVERFLOW,
+        database.DB_POOL_TIMEOUT,
+    )
+    assert pool._recycle == database.DB_POOL_RECYCLE
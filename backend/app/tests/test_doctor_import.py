@@ -0,0 +1,109 @@
+"""
+Tests for the bulk doctor importer.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Insert
+
+from app.services import doctor_import
+
+
+class _ImportSession:
+    """Knows some registered emails and records inserted rows."""
+
+    def __init__(self, registered: set[str]):
+        self.registered = registered
+        self.inserted: list[dict] = []
+        self.existence_sql = None
+        self.commits = 0
+
+    async def exec(self, statement):
+        session = self
+
+        if isinstance(statement, Insert):
+            rows = statement.compile(dialect=postgresql.dialect()).params
+            emails = [value for key, value in rows.items() if key.startswith("email")]
+            self.inserted.extend(emails)
+
+            class _InsertResult:
+                def scalars(self):
+                    return emails
+
+            return _InsertResult()
+
+        self.existence_sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        class _Result:
+            def all(self):
+                emails = statement.compile().params["emails"]
+                return [email for email in emails if email in session.registered]
+
+        return _Result()
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_read_rows_csv_and_jsonl(tmp_path):
+    """Test that both formats yield line-numbered rows and bad JSON is reported."""
+    csv_file = tmp_path / "doctors.csv"
+    csv_file.write_text(
+        "email,full_name,password,department\n"
+        "a@hospital.com,Dr. A,secret1,Cardiology\n"
+        "b@hospital.com,Dr. B,secret2,\n",
+        encoding="utf-8",
+    )
+    rows = doctor_import.read_rows(csv_file)
+    assert [line for line, _ in rows] == [2, 3]
+    assert rows[1][1]["department"] is None
+
+    jsonl_file = tmp_path / "doctors.jsonl"
+    jsonl_file.write_text('{"email": "a@hospital.com"}\n\n{broken\n', encoding="utf-8")
+    rows = doctor_import.read_rows(jsonl_file)
+    assert rows[0] == (1, {"email": "a@hospital.com"})
+    assert rows[1][0] == 3 and "_error" in rows[1][1]
+
+
+@pytest.mark.asyncio
+async def test_non_object_json_lines_are_row_errors(tmp_path):
+    """Test that scalars and arrays are reported per line instead of failing the import."""
+    jsonl_file = tmp_path / "doctors.jsonl"
+    jsonl_file.write_text(
+        '5\n["a@hospital.com"]\n{"email": "a@hospital.com", "full_name": "Dr. A", "password": "secret1"}\n',
+        encoding="utf-8",
+    )
+    session = _ImportSession(registered=set())
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        report = await doctor_import.import_doctors(session, doctor_import.read_rows(jsonl_file), executor)
+
+    assert report.inserted == 1
+    assert [(error.line, error.email) for error in report.errors] == [(1, None), (2, None)]
+    assert "JSON nesnesi" in report.errors[0].message
+
+
+@pytest.mark.asyncio
+async def test_import_reports_invalid_duplicate_and_existing_rows():
+    """Test that only valid, new, first-seen emails are inserted in one commit."""
+    rows = [
+        (2, {"email": "New@Hospital.com", "full_name": "Dr. New", "password": "secret1"}),
+        (3, {"email": "new@hospital.com", "full_name": "Dr. Copy", "password": "secret1"}),
+        (4, {"email": "old@hospital.com", "full_name": "Dr. Old", "password": "secret1"}),
+        (5, {"email": "short@hospital.com", "full_name": "Dr. Short", "password": "123"}),
+        (6, {"email": "not-an-email", "full_name": "Dr. X", "password": "secret1"}),
+    ]
+    session = _ImportSession(registered={"old@hospital.com"})
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        report = await doctor_import.import_doctors(session, rows, executor)
+
+    assert report.inserted == 1
+    assert session.inserted == ["new@hospital.com"]
+    assert session.commits == 1
+    assert "= ANY (" in session.existence_sql
+    assert [error.line for error in report.errors] == [3, 4, 5, 6]
+    assert "zaten kayıtlı" in report.errors[1].message
+    assert report.errors[2].message.startswith("password:")
@@ -0,0 +1,62 @@
+"""
+Tests for the versioned doctor roster cache.
+"""
+
+import pytest
+
+from app.api.doctor_routes import _department_counts_header, _etag_matches, _name_filter
+from app.core.redis import MEMORY_URL, create_redis
+from app.models import UserRole
+from app.services import doctor_roster
+
+
+@pytest.mark.asyncio
+async def test_roster_reloads_only_after_version_bump(make_user, fake_session):
+    """Test that workers reuse the roster until the shared version moves."""
+    redis = create_redis(MEMORY_URL)
+    session = fake_session(users=[make_user(1, UserRole.doctor)])
+
+    first = await doctor_roster.get_roster(session, redis)
+    second = await doctor_roster.get_roster(session, redis)
+    assert len(session.statements) == 1
+    assert first.etag == second.etag
+
+    session.tables["users"].append(make_user(2, UserRole.doctor))
+    await doctor_roster.bump_version(redis)
+    third = await doctor_roster.get_roster(session, redis)
+    assert len(session.statements) == 2
+    assert [doctor["id"] for doctor in third.doctors] == [1, 2]
+    assert third.etag != first.etag
+    await redis.aclose()
+
+
+def test_if_none_match_handling():
+    """Test strong ETag matching including lists and wildcards."""
+    assert _etag_matches('"abc"', '"abc"')
+    assert _etag_matches('"x", "abc"', '"abc"')
+    assert _etag_matches("*", '"abc"')
+    assert not _etag_matches(None, '"abc"')
+    assert not _etag_matches('W/"abc"', '"abc"')
+
+
+@pytest.mark.asyncio
+async def test_roster_department_counts(monkeypatch, make_user, fake_session):
+    """Test that the cached roster carries per-department doctor counts."""
+    monkeypatch.setattr(doctor_roster, "_snapshot", None)
+    redis = create_redis(MEMORY_URL)
+    await doctor_roster.bump_version(redis)
+    session = fake_session(users=[
+        make_user(1, UserRole.doctor, department="Kardiyoloji"),
+        make_user(2, UserRole.doctor, department="Kardiyoloji"),
+        make_user(3, UserRole.doctor),
+    ])
+    roster = await doctor_roster.get_roster(session, redis)
+    assert roster.department_counts == {"Kardiyoloji": 2, "": 1}
+    assert _department_counts_header({"Göz": 1}) == '{"G\\u00f6z":1}'
+    await redis.aclose()
+
+
+def test_name_filter_escapes_wildcards():
+    """Test that LIKE wildcards in the search term match literally."""
+    compiled = _name_filter("50%_a").compile(compile_kwargs={"literal_binds": True})
+    assert "%50\\%\\_a%" in str(compiled)
@@ -0,0 +1,32 @@
+"""
+Tests for sparse fieldsets.
+"""
+
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.fields import parse_fields
+from app.models import UserRead, UserRole
+from app.services.doctor_roster import RosterSnapshot
+
+
+def test_parse_fields():
+    """Test field order, the implied id and unknown names."""
+    assert parse_fields(None) is None
+    assert parse_fields("department, full_name,") == ("full_name", "id", "department")
+    with pytest.raises(HTTPException) as e:
+        parse_fields("full_name,password_hash")
+    assert e.value.status_code == 400
+
+
+def test_roster_projection_has_its_own_etag(make_user):
+    """Test that the cached roster is trimmed per field set with a distinct ETag."""
+    doctor = make_user(1, UserRole.doctor, department="Kardiyoloji", medical_history="secret")
+    doctors = [UserRead.model_validate(doctor).model_dump(mode="json")]
+    snapshot = RosterSnapshot(1, json.dumps(doctors).encode(), '"full"', {}, doctors)
+    body, etag = snapshot.projected(("full_name", "id"))
+    assert json.loads(body) == [{"full_name": "User 1", "id": 1}]
+    assert etag != snapshot.etag
+    assert snapshot.projected(("full_name", "id")) == (body, etag)
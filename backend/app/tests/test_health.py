@@ -0,0 +1,160 @@
+"""
+Tests for the cached readiness probes.
+"""
+
+import asyncio
+import os
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import health
+from app.core.health import HealthMonitor, health_monitor
+from app.main import app
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+async def _ok():
+    return {"detail": 1}
+
+
+async def _down():
+    raise ConnectionError("refused")
+
+
+async def _hangs():
+    await asyncio.sleep(10)
+
+
+@pytest.mark.asyncio
+async def test_critical_failure_makes_the_pod_unready():
+    """Test that only critical dependencies decide readiness."""
+    monitor = HealthMonitor({"postgres": _ok, "redis": _down}, critical={"postgres"}, timeout=0.05)
+    ready, body = monitor.report()
+    assert not ready and body["status"] == "starting"
+
+    await monitor.check()
+    ready, body = monitor.report()
+    assert ready and body["status"] == "degraded"
+    assert body["checks"]["postgres"]["detail"] == 1
+    assert body["checks"]["redis"]["error"] == "refused"
+
+    monitor.probes["postgres"] = _hangs
+    await monitor.check()
+    ready, body = monitor.report()
+    assert not ready and body["status"] == "unavailable"
+    assert "timed out" in body["checks"]["postgres"]["error"]
+
+
+@pytest.mark.asyncio
+async def test_exhausted_pool_only_degrades():
+    """Test that a busy connection pool does not take the pod out of rotation."""
+    monitor = HealthMonitor(
+        {"postgres": _ok, "db_pool": _down}, critical=health_monitor.critical, timeout=0.05
+    )
+    await monitor.check()
+    ready, body = monitor.report()
+    assert ready and body["status"] == "degraded"
+    assert not body["checks"]["db_pool"]["ok"]
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint_serves_the_cached_verdict(monkeypatch):
+    """Test /health/ready status codes without probing on the request path."""
+    calls = []
+
+    async def counted():
+        calls.append(1)
+
+    monitor = HealthMonitor({"postgres": counted}, critical={"postgres"})
+    monkeypatch.setattr("app.api.health_routes.health_monitor", monitor)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/health/ready")).status_code == 503
+        await monitor.check()
+        for _ in range(3):
+            response = await client.get("/health/ready")
+            assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+        assert len(calls) == 1
+        assert (await client.get("/health/live")).status_code == 200
+
+
+async def _ready_while_pool_is_held(monkeypatch, pool_engine) -> tuple[int, dict]:
+    monkeypatch.setattr(health, "engine", pool_engine)
+    monitor = HealthMonitor(
+        {"postgres": health.probe_postgres, "db_pool": health.probe_db_pool},
+        critical=health_monitor.critical,
+        timeout=0.5,
+    )
+    monkeypatch.setattr("app.api.health_routes.health_monitor", monitor)
+    await monitor.check()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/health/ready")
+    return response.status_code, response.json()
+
+
+class _ExhaustedPool:
+    def size(self):
+        return 1
+
+    def checkedout(self):
+        return 1
+
+    def overflow(self):
+        return 0
+
+    _max_overflow = 0
+
+
+class _ExhaustedEngine:
+    """Every slot is checked out: a checkout waits out the pool timeout."""
+
+    pool = _ExhaustedPool()
+
+    def connect(self):
+        raise AssertionError("the Postgres probe must not queue for a pooled connection")
+
+
+class _Connection:
+    async def execute(self, query):
+        assert query == "SELECT 1"
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_exhausted_pool_keeps_the_pod_ready(monkeypatch):
+    """Test that Postgres is probed outside the request pool while every slot is held."""
+
+    async def connect(dsn, timeout):
+        return _Connection()
+
+    monkeypatch.setattr(health.asyncpg, "connect", connect)
+    status_code, body = await _ready_while_pool_is_held(monkeypatch, _ExhaustedEngine())
+    assert status_code == 200
+    assert body["status"] == "degraded"
+    assert body["checks"]["postgres"]["ok"]
+    assert body["checks"]["db_pool"]["error"] == "connection pool exhausted"
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+async def test_exhausted_pool_keeps_the_pod_ready_on_postgres(monkeypatch):
+    """Test the same against Postgres with the only pooled connection checked out."""
+    pool_engine = create_async_engine(TEST_DATABASE_URL, pool_size=1, max_overflow=0, pool_timeout=10)
+    monkeypatch.setattr(
+        health, "PROBE_DSN", TEST_DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+    )
+    try:
+        async with pool_engine.connect():
+            status_code, body = await _ready_while_pool_is_held(monkeypatch, pool_engine)
+    finally:
+        await pool_engine.dispose()
+    assert status_code == 200
+    assert body["status"] == "degraded"
+    assert body["checks"]["postgres"]["ok"]
@@ -0,0 +1,93 @@
+"""
+Tests for Idempotency-Key handling.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+
+from app.core import idempotency
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.redis import MEMORY_URL, create_redis
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    redis = create_redis(MEMORY_URL)
+    await redis.flushall()
+    monkeypatch.setattr(idempotency, "get_redis", lambda: redis)
+
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/appointments", status_code=201)
+    async def book(payload: dict):
+        app.state.calls += 1
+        await asyncio.sleep(0.1)
+        if payload.get("fail"):
+            return Response(status_code=500)
+        if payload.get("limited") and app.state.calls == 1:
+            return Response(status_code=429, headers={"Retry-After": "1"})
+        if payload.get("taken"):
+            return Response(status_code=409)
+        return {"booking": app.state.calls, **payload}
+
+    transport = httpx.ASGITransport(app=IdempotencyMiddleware(app))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        client.app = app
+        yield client
+    await redis.aclose()
+
+
+async def test_duplicates_replay_the_first_response(client):
+    """Test byte-for-byte replay, also for a duplicate sent while the first runs."""
+    headers = {"Idempotency-Key": "k1", "Authorization": "Bearer a"}
+    first, concurrent = await asyncio.gather(
+        client.post("/appointments", json={"doctor_id": 1}, headers=headers),
+        client.post("/appointments", json={"doctor_id": 1}, headers=headers),
+    )
+    retry = await client.post("/appointments", json={"doctor_id": 1}, headers=headers)
+
+    assert client.app.state.calls == 1
+    assert first.status_code == concurrent.status_code == retry.status_code == 201
+    assert first.content == concurrent.content == retry.content
+    assert retry.headers[idempotency.REPLAYED_HEADER] == "true"
+
+    # Another caller or no key: not deduplicated
+    await client.post("/appointments", json={"doctor_id": 1}, headers={"Idempotency-Key": "k1"})
+    await client.post("/appointments", json={"doctor_id": 1})
+    assert client.app.state.calls == 3
+
+
+async def test_key_reuse_and_server_errors(client):
+    """Test 422 for a different body and that 5xx responses are not stored."""
+    headers = {"Idempotency-Key": "k2"}
+    assert (await client.post("/appointments", json={"doctor_id": 1}, headers=headers)).status_code == 201
+    reused = await client.post("/appointments", json={"doctor_id": 2}, headers=headers)
+    assert reused.status_code == 422
+
+    headers = {"Idempotency-Key": "k3"}
+    for _ in range(2):
+        failed = await client.post("/appointments", json={"fail": True}, headers=headers)
+        assert failed.status_code == 500
+    assert client.app.state.calls == 3
+
+
+async def test_transient_errors_are_retried_and_conflicts_replayed(client):
+    """Test that a rate-limited request runs again while a 409 is stored."""
+    headers = {"Idempotency-Key": "k4"}
+    limited = await client.post("/appointments", json={"limited": True}, headers=headers)
+    assert limited.status_code == 429
+    retry = await client.post("/appointments", json={"limited": True}, headers=headers)
+    assert retry.status_code == 201
+    assert idempotency.REPLAYED_HEADER not in retry.headers
+    assert client.app.state.calls == 2
+
+    headers = {"Idempotency-Key": "k5"}
+    await client.post("/appointments", json={"taken": True}, headers=headers)
+    conflict = await client.post("/appointments", json={"taken": True}, headers=headers)
+    assert conflict.status_code == 409
+    assert conflict.headers[idempotency.REPLAYED_HEADER] == "true"
+    assert client.app.state.calls == 3
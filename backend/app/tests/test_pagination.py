@@ -0,0 +1,24 @@
+"""
+Tests for keyset pagination cursors.
+"""
+
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes to the key it was built from."""
+    key = (datetime(2025, 3, 1, 9, 30), 42)
+    assert decode_cursor(encode_cursor(*key), datetime, int) == list(key)
+
+
+@pytest.mark.parametrize("token", ["not-a-cursor", encode_cursor(1, 2), encode_cursor(1)])
+def test_invalid_cursor_is_rejected(token):
+    """Test that malformed or mistyped cursors return 400."""
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(token, datetime, int)
+    assert exc_info.value.status_code == 400
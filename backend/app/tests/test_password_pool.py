@@ -0,0 +1,39 @@
+"""
+Tests for the bounded password hashing pool.
+"""
+
+import asyncio
+
+import pytest
+
+from app.auth import hash_password, verify_password
+from app.core.password_pool import PasswordPool, PasswordPoolSaturated
+
+
+@pytest.mark.asyncio
+async def test_pool_hashes_and_verifies():
+    """Test that hashing and verification run in the pool."""
+    pool = PasswordPool(workers=1, max_pending=4)
+    try:
+        hashed = await pool.run(hash_password, "Patient123!")
+        assert await pool.run(verify_password, "Patient123!", hashed)
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_when_saturated():
+    """Test that jobs beyond max_pending are rejected with a retry hint."""
+    pool = PasswordPool(workers=1, max_pending=1)
+    try:
+        results = await asyncio.gather(
+            pool.run(hash_password, "Patient123!"),
+            pool.run(hash_password, "Patient123!"),
+            return_exceptions=True,
+        )
+        rejected = [r for r in results if isinstance(r, PasswordPoolSaturated)]
+        assert len(rejected) == 1
+        assert rejected[0].retry_after >= 1
+    finally:
+        pool.shutdown()
@@ -0,0 +1,110 @@
+"""
+Tests for the authenticated principal cache.
+"""
+
+import asyncio
+
+import pytest
+from redis.asyncio import Redis
+
+from app.core.principal_cache import PrincipalCache, TTLCache
+from app.core.redis import MEMORY_URL, create_redis
+from app.models import UserRead, UserRole
+
+
+def _principal(user_id: int = 1) -> UserRead:
+    return UserRead(
+        id=user_id, email=f"user{user_id}@example.com", full_name="Test User", role=UserRole.patient
+    )
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test that the LRU keeps at most maxsize entries."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set((1, 0), _principal(1))
+    cache.set((2, 0), _principal(2))
+    assert cache.get((1, 0)) is not None
+    cache.set((3, 0), _principal(3))
+    assert cache.get((2, 0)) is None
+    assert cache.get((1, 0)) is not None
+
+
+def test_ttl_cache_expires_entries():
+    """Test that expired entries are not returned."""
+    cache = TTLCache(maxsize=10, ttl=-1)
+    cache.set((1, 0), _principal(1))
+    assert cache.get((1, 0)) is None
+
+
+def test_ttl_cache_discards_all_tokens_of_a_user():
+    """Test that invalidation drops every iat of the user only."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set((1, 100), _principal(1))
+    cache.set((1, 200), _principal(1))
+    cache.set((2, 100), _principal(2))
+    cache.discard_user(1)
+    assert cache.get((1, 100)) is None
+    assert cache.get((1, 200)) is None
+    assert cache.get((2, 100)) is not None
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_unreachable_redis():
+    """Test that a Redis outage degrades to the local tier instead of failing."""
+    redis = Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1)
+    cache = PrincipalCache(TTLCache(maxsize=10, ttl=60), redis_ttl=60)
+
+    assert await cache.get(redis, 1, 100) is None
+    await cache.set(redis, 100, _principal(1))
+    assert (await cache.get(redis, 1, 100)).id == 1
+    await cache.invalidate(redis, 1)
+    assert await cache.get(redis, 1, 100) is None
+    await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_workers():
+    """Test that a change made through one worker clears another's local tier."""
+    redis = create_redis(MEMORY_URL)
+    await redis.flushall()
+    here = PrincipalCache(TTLCache(maxsize=10, ttl=60), redis_ttl=60)
+    there = PrincipalCache(TTLCache(maxsize=10, ttl=60), redis_ttl=60)
+    await there.start(redis)
+    await asyncio.sleep(0.05)
+    try:
+        await there.set(redis, 100, _principal(1))
+        await there.set(redis, 100, _principal(2))
+        await here.invalidate(redis, 1)
+        for _ in range(50):
+            if there.local.get((1, 100)) is None:
+                break
+            await asyncio.sleep(0.02)
+        assert there.local.get((1, 100)) is None
+        assert there.local.get((2, 100)) is not None
+    finally:
+        await there.stop()
+        await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_invalidate_all_drops_every_principal():
+    """Test the flush used after users are replaced outside the API (datagen --truncate)."""
+    redis = create_redis(MEMORY_URL)
+    await redis.flushall()
+    here = PrincipalCache(TTLCache(maxsize=10, ttl=60), redis_ttl=60)
+    there = PrincipalCache(TTLCache(maxsize=10, ttl=60), redis_ttl=60)
+    await there.start(redis)
+    await asyncio.sleep(0.05)
+    try:
+        await there.set(redis, 100, _principal(1))
+        await there.set(redis, 100, _principal(2))
+        await here.invalidate_all(redis)
+        for _ in range(50):
+            if there.local.get((2, 100)) is None:
+                break
+            await asyncio.sleep(0.02)
+        assert there.local.get((1, 100)) is None and there.local.get((2, 100)) is None
+        assert await here.get(redis, 2, 100) is None
+    finally:
+        await there.stop()
+        await redis.aclose()
@@ -0,0 +1,107 @@
+"""
+Tests for rate limiting and the concurrency cap.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from app.core.rate_limit import ConcurrencyLimitMiddleware, RateLimit, RateLimiter
+from app.core.redis import MEMORY_URL, create_redis, get_redis
+
+
+def test_rate_limit_parses_requests_per_seconds():
+    """Test the RATE_LIMIT_<NAME> format."""
+    assert RateLimit.parse("10/60") == RateLimit(10, 60.0)
+    assert RateLimit.parse("5").rate == 5.0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_rejects_with_retry_after():
+    """Test that each client and route gets its own bucket."""
+    redis = create_redis(MEMORY_URL)
+    await redis.flushall()
+    app = FastAPI()
+    app.dependency_overrides[get_redis] = lambda: redis
+    limiter = Depends(RateLimiter(RateLimit(2, 60)))
+
+    @app.get("/a", dependencies=[limiter])
+    async def route_a():
+        return {}
+
+    @app.get("/b", dependencies=[limiter])
+    async def route_b():
+        return {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert [(await client.get("/a")).status_code for _ in range(3)] == [200, 200, 429]
+        rejected = await client.get("/a")
+        assert rejected.status_code == 429
+        assert 1 <= int(rejected.headers["Retry-After"]) <= 30
+        assert (await client.get("/b")).status_code == 200
+    await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_anonymous_clients_behind_the_proxy_get_their_own_buckets():
+    """Test that the client IP comes from the nearest untrusted X-Forwarded-For hop."""
+    redis = create_redis(MEMORY_URL)
+    await redis.flushall()
+    await redis.script_flush()
+    app = FastAPI()
+    app.dependency_overrides[get_redis] = lambda: redis
+
+    @app.get("/a", dependencies=[Depends(RateLimiter(RateLimit(1, 60)))])
+    async def route_a():
+        return {}
+
+    # The peer is nginx on the Docker network
+    transport = httpx.ASGITransport(app=app, client=("172.18.0.5", 40000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def get(forwarded_for: str) -> int:
+            return (await client.get("/a", headers={"X-Forwarded-For": forwarded_for})).status_code
+
+        assert await get("203.0.113.7") == 200
+        assert await get("203.0.113.8") == 200
+        assert await get("203.0.113.7") == 429
+        # A hop the client made up is ignored
+        assert await get("198.51.100.1, 203.0.113.7") == 429
+        assert await get("203.0.113.9, 10.0.0.3") == 200
+
+    # Direct callers are keyed by the peer, whatever they forward
+    transport = httpx.ASGITransport(app=app, client=("203.0.113.8", 40000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/a", headers={"X-Forwarded-For": "198.51.100.2"})
+        assert response.status_code == 429
+    await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_sheds_excess_requests():
+    """Test that requests beyond the cap get 503 while health checks pass."""
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    app = ConcurrencyLimitMiddleware(slow_app, limit=1)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = asyncio.create_task(client.get("/doctors"))
+        await asyncio.sleep(0.01)
+        shed = await client.get("/doctors")
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "1"
+        assert shed.json()["path"] == "/doctors"
+
+        health = asyncio.create_task(client.get("/health/live"))
+        release.set()
+        assert (await first).status_code == 200
+        assert (await health).status_code == 200
+    assert app.in_flight == 0
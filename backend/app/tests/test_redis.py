@@ -0,0 +1,59 @@
+"""
+Tests for the shared Redis client and the features built on it,
+run against the in-process fake.
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from app.core.principal_cache import PrincipalCache, TTLCache
+from app.core.redis import MEMORY_URL, create_redis
+from app.models import Appointment, UserRead, UserRole
+from app.services import availability
+
+
+@pytest.fixture
+async def redis():
+    client = create_redis(MEMORY_URL)
+    yield client
+    await client.flushall()
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_memory_url_gives_working_client(redis):
+    """Test that memory:// yields a usable in-process client."""
+    await redis.set("key", "value")
+    assert await redis.get("key") == "value"
+
+
+@pytest.mark.asyncio
+async def test_principal_shared_tier_serves_other_workers(redis):
+    """Test that a principal cached by one worker is visible to another."""
+    principal = UserRead(id=7, email="p@example.com", full_name="Pat", role=UserRole.patient)
+    worker_a = PrincipalCache(TTLCache(maxsize=10, ttl=60), redis_ttl=60)
+    worker_b = PrincipalCache(TTLCache(maxsize=10, ttl=60), redis_ttl=60)
+
+    await worker_a.set(redis, 100, principal)
+    assert (await worker_b.get(redis, 7, 100)) == principal
+
+    await worker_a.invalidate(redis, 7)
+    worker_b.local.clear()
+    assert await worker_b.get(redis, 7, 100) is None
+
+
+@pytest.mark.asyncio
+async def test_availability_index_updates_incrementally(redis):
+    """Test that booking and cancelling edit a built day without a rebuild."""
+    day = date(2025, 3, 1)
+    await redis.hset(availability._key(1, day), mapping={availability._BUILT: "1"})
+    appointment = Appointment(id=5, doctor_id=1, patient_id=2, start_time=datetime(2025, 3, 1, 10))
+
+    await availability.record_booking(redis, appointment)
+    busy = await availability.get_busy_intervals(None, redis, [1], [day])
+    assert busy[(1, day)] == [(600, 660)]
+
+    await availability.record_cancellation(redis, appointment)
+    busy = await availability.get_busy_intervals(None, redis, [1], [day])
+    assert busy[(1, day)] == []
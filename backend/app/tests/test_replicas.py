@@ -0,0 +1,93 @@
+"""
+Tests for read routing to replicas.
+"""
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.auth import create_access_token
+from app.core import replicas
+from app.core.redis import MEMORY_URL, create_redis
+from app.core.replicas import Replica, ReplicaRouter
+
+
+class _Session:
+    def __init__(self, target: str, fails: bool = False):
+        self.target = target
+        self.fails = fails
+        self.closed = False
+
+    async def connection(self):
+        if self.fails:
+            raise OSError("connection refused")
+
+    async def close(self):
+        self.closed = True
+
+
+def _replica(name: str, fails: bool = False, available: bool = True) -> Replica:
+    return Replica(name, None, lambda: _Session(name, fails), available=available)
+
+
+@pytest.mark.asyncio
+async def test_reads_use_a_healthy_replica_and_fall_back_to_the_primary():
+    """Test replica selection, connect-failure fallback and sticky reads."""
+    router = ReplicaRouter({}, lambda: _Session("primary"))
+    assert (await router.session(prefer_replica=True)).target == "primary"
+
+    router.replicas = [_replica("down", available=False), _replica("r1")]
+    assert (await router.session(prefer_replica=True)).target == "r1"
+    assert (await router.session(prefer_replica=False)).target == "primary"
+
+    router.replicas = [_replica("broken", fails=True)]
+    assert (await router.session(prefer_replica=True)).target == "primary"
+    assert not router.replicas[0].available
+
+
+@pytest.mark.asyncio
+async def test_writers_read_their_writes_from_the_primary(monkeypatch):
+    """Test that mark_write pins only the writing users to the primary."""
+    monkeypatch.setattr(replicas.replica_router, "replicas", [_replica("r1")])
+    redis = create_redis(MEMORY_URL)
+    await redis.flushall()
+
+    def bearer(user_id: int) -> HTTPAuthorizationCredentials:
+        token = create_access_token({"sub": str(user_id)})
+        return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    assert await replicas._may_use_replica(redis, bearer(7))
+    await replicas.mark_write(redis, 7, 1)
+    assert not await replicas._may_use_replica(redis, bearer(7))
+    assert not await replicas._may_use_replica(redis, bearer(1))
+    assert await replicas._may_use_replica(redis, bearer(8))
+    assert await replicas._may_use_replica(redis, None)
+    assert 0 < await redis.ttl("replica:sticky:7") <= replicas.STICKY_SECONDS
+    await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_lazy_read_session_connects_only_when_asked(monkeypatch):
+    """Test that a request that never reads checks out no replica connection."""
+    opened = []
+
+    def factory() -> _Session:
+        opened.append(_Session("r1"))
+        return opened[-1]
+
+    monkeypatch.setattr(replicas.replica_router, "replicas", [Replica("r1", None, factory, available=True)])
+    redis = create_redis(MEMORY_URL)
+    await redis.flushall()
+
+    unused = replicas.get_lazy_read_session(None, redis)
+    await anext(unused)
+    await unused.aclose()
+    assert opened == []
+
+    used = replicas.get_lazy_read_session(None, redis)
+    read_session = await anext(used)
+    session = await read_session()
+    assert session.target == "r1"
+    assert await read_session() is session
+    await used.aclose()
+    assert len(opened) == 1 and session.closed
+    await redis.aclose()
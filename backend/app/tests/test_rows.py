@@ -0,0 +1,68 @@
+"""
+Tests for the ORM-free read path.
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import Response
+
+from app.core.fields import USER_FIELDS
+from app.core.rows import (
+    APPOINTMENT_FIELDS,
+    appointments_with_users,
+    as_dicts,
+    json_response,
+)
+from app.models import (
+    Appointment,
+    AppointmentRead,
+    AppointmentStatus,
+    User,
+    UserRead,
+    UserRole,
+)
+
+
+def _row(obj, fields: tuple[str, ...]) -> tuple:
+    return tuple(getattr(obj, name) for name in fields)
+
+
+@pytest.fixture
+def users(make_user) -> tuple[User, User]:
+    extra = {"age": 40, "department": "Göz", "allergies": "Penisilin"}
+    return make_user(1, UserRole.doctor, **extra), make_user(2, UserRole.patient, **extra)
+
+
+def test_rows_serialize_like_the_response_model(users):
+    """Test that orjson output of the row dicts equals the UserRead JSON."""
+    user = users[0]
+    response = Response()
+    response.headers["X-Next-Cursor"] = "abc"
+    rendered = json_response(as_dicts([(*_row(user, USER_FIELDS), "keyset")], USER_FIELDS), response)
+    assert rendered.body == f"[{UserRead.model_validate(user).model_dump_json()}]".encode()
+    assert rendered.headers["X-Next-Cursor"] == "abc"
+
+
+@pytest.mark.asyncio
+async def test_appointments_nest_their_users(users, fake_session):
+    """Test nesting doctor and patient (also with a field set) as AppointmentRead does."""
+    doctor, patient = users
+    appointment = Appointment(
+        id=5, doctor_id=1, patient_id=2, start_time=datetime(2030, 1, 1, 9, 30, 0, 250),
+        status=AppointmentStatus.active,
+    )
+    session = fake_session(users=[doctor, patient])
+
+    appointments = await appointments_with_users(session, [_row(appointment, APPOINTMENT_FIELDS)])
+    appointment.doctor, appointment.patient = doctor, patient
+    expected = AppointmentRead.model_validate(appointment).model_dump_json()
+    assert json_response(appointments, Response()).body == f"[{expected}]".encode()
+
+    trimmed = await appointments_with_users(
+        session, [_row(appointment, APPOINTMENT_FIELDS)], ("full_name", "id")
+    )
+    body = json.loads(json_response(trimmed, Response()).body)
+    assert body[0]["doctor"] == {"full_name": "User 1", "id": 1}
+    assert body[0]["patient"] == {"full_name": "User 2", "id": 2}
@@ -0,0 +1,50 @@
+"""
+Tests for schema-level invariants declared on the models.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.api.appointment_routes import _booking_statement
+from app.database import SCHEMA_UPGRADES
+from app.models import Appointment, AppointmentCreate
+
+
+def _appointments_ddl() -> str:
+    return str(CreateTable(Appointment.__table__).compile(dialect=postgresql.dialect()))
+
+
+def test_appointments_have_generated_slot_range():
+    """Test that the booked range is a stored generated column."""
+    assert "slot TSRANGE GENERATED ALWAYS AS" in _appointments_ddl()
+
+
+def test_appointments_exclude_overlapping_active_slots():
+    """Test that Postgres rejects overlapping active appointments of a doctor."""
+    ddl = _appointments_ddl()
+    assert "EXCLUDE USING gist (doctor_id WITH =, slot WITH &&)" in ddl
+    assert "WHERE (status = 'active')" in ddl
+
+
+def test_overlapping_data_fails_the_constraint_upgrade():
+    """Test that an existing database with overlaps does not boot without the constraint."""
+    upgrade = next(statement for statement in SCHEMA_UPGRADES if "EXCLUDE USING gist" in statement)
+    handler = upgrade.split("WHEN exclusion_violation THEN", 1)[1]
+    assert "RAISE EXCEPTION" in handler
+    assert "RAISE WARNING" not in upgrade
+
+
+def test_slot_column_is_not_mapped():
+    """Test that ORM inserts never try to write the generated column."""
+    assert "slot" not in Appointment.__mapper__.columns
+
+
+def test_booking_returns_the_doctor_in_the_same_statement():
+    """Test that the booking INSERT is joined back to the doctor in one statement."""
+    statement = _booking_statement(7, AppointmentCreate(doctor_id=3, start_time=datetime(2031, 1, 1, 9)))
+    sql = " ".join(str(statement.compile(dialect=postgresql.dialect())).split())
+    assert sql.startswith("WITH booked AS (INSERT INTO appointments")
+    assert "FROM booked JOIN users ON users.id = booked.doctor_id" in sql
+    assert "users.full_name AS doctor__full_name" in sql
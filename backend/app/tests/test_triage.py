@@ -0,0 +1,53 @@
+"""
+Tests for the triage priority queue.
+"""
+
+import pytest
+
+from app.core.redis import MEMORY_URL, create_redis
+from app.models import UserRead, UserRole
+from app.services import triage
+
+
+def _patient(user_id: int, age: int | None, history: str | None) -> UserRead:
+    return UserRead(
+        id=user_id,
+        email=f"p{user_id}@example.com",
+        full_name="Patient",
+        role=UserRole.patient,
+        age=age,
+        medical_history=history,
+    )
+
+
+def test_score_orders_conditions_by_urgency():
+    """Test that urgent conditions outrank chronic ones."""
+    assert triage.priority_score(35, "Chest Pain") > triage.priority_score(35, "Fever")
+    assert triage.priority_score(35, "Fever") > triage.priority_score(35, "Asthma")
+
+
+def test_score_weights_age_for_the_same_condition():
+    """Test that elderly patients rank above adults with the same condition."""
+    assert triage.priority_score(80, "fever") > triage.priority_score(30, "fever")
+
+
+def test_patients_without_conditions_are_not_queued():
+    """Test that a zero score keeps a patient out of the queue."""
+    assert triage.priority_score(90, None) == 0
+    assert triage.priority_score(90, "None") == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_is_updated_incrementally():
+    """Test that profile writes re-rank patients without a rebuild."""
+    redis = create_redis(MEMORY_URL)
+    await redis.set(triage.BUILT_KEY, "1")
+
+    await triage.update_patient(redis, _patient(1, 30, "Fever"))
+    await triage.update_patient(redis, _patient(2, 40, "Chest Pain"))
+    await triage.update_patient(redis, _patient(3, 30, "Asthma"))
+    assert await triage.top_patient_ids(None, redis, 2) == [2, 1]
+
+    await triage.update_patient(redis, _patient(2, 40, "Recovered"))
+    assert await triage.top_patient_ids(None, redis, 10) == [1, 3]
+    await redis.aclose()
@@ -0,0 +1,243 @@
+"""
+End-to-end API latency benchmark.
+
+Drives the hot routes with a fixed number of requests at a given
+concurrency and reports throughput and p50/p95/p99 latency per scenario:
+login, /doctors, /appointments/my, booking and /patients/priority.
+Booking creates real appointments (conflicts count as expected 409s), so
+point it at a disposable, seeded database.
+
+In-process (runs the app lifespan itself, no HTTP server):
+
+    python -m benchmarks.api_latency
+
+Against a running deployment (started with RATE_LIMIT_ENABLED=false, or the
+benchmark measures 429s), saving a baseline and comparing against it:
+
+    python -m benchmarks.api_latency --url http://localhost:8000 --save baseline.json
+    python -m benchmarks.api_latency --url http://localhost:8000 --baseline baseline.json
+
+With --baseline the exit code is 1 when any scenario's p95 grew, or its
+throughput fell, by more than --tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+from benchmarks.concurrency import percentile
+
+PATIENT = ("patient@hospital.com", "Patient123!")
+DOCTOR = ("sarah.chen@hospital.com", "Doctor123!")
+
+
+@dataclass
+class Context:
+    patient_token: str
+    doctor_token: str
+    doctor_ids: list[int]
+    rng: random.Random
+
+    def auth(self, token: str) -> dict:
+        return {"Authorization": f"Bearer {token}"}
+
+
+Scenario = Callable[[httpx.AsyncClient, Context], Awaitable[httpx.Response]]
+
+
+async def _login(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    email, password = PATIENT
+    return await client.post("/auth/login", json={"email": email, "password": password})
+
+
+async def _doctors(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/doctors")
+
+
+async def _my_appointments(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/appointments/my", headers=ctx.auth(ctx.patient_token))
+
+
+async def _book(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    # Spread over a year of working hours so most bookings succeed
+    day = datetime.now(UTC).date() + timedelta(days=ctx.rng.randrange(1, 366))
+    start = datetime(day.year, day.month, day.day, ctx.rng.randrange(9, 17), tzinfo=UTC)
+    return await client.post(
+        "/appointments",
+        json={"doctor_id": ctx.rng.choice(ctx.doctor_ids), "start_time": start.isoformat()},
+        headers=ctx.auth(ctx.patient_token),
+    )
+
+
+async def _priority(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/patients/priority", headers=ctx.auth(ctx.doctor_token))
+
+
+# name -> (scenario, status codes that count as success)
+SCENARIOS: dict[str, tuple[Scenario, set[int]]] = {
+    "login": (_login, {200}),
+    "doctors": (_doctors, {200}),
+    "appointments_my": (_my_appointments, {200}),
+    "book": (_book, {201, 409}),
+    "priority": (_priority, {200}),
+}
+
+
+async def _token(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    ctx: Context,
+    scenario: Scenario,
+    expected: set[int],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict:
+    """Issue `requests` calls from `concurrency` workers and summarize them"""
+    for _ in range(warmup):
+        await scenario(client, ctx)
+
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, ctx)
+                outcome = None if response.status_code in expected else str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            if outcome is None:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Scenarios whose p95 or throughput regressed beyond tolerance"""
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms")
+        if row["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['rps']:.1f} -> {row['rps']:.1f} req/s")
+    return regressions
+
+
+def _delta(value: float, base: float | None) -> str:
+    if not base:
+        return ""
+    return f" ({(value - base) / base * 100:+.0f}%)"
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else {}
+
+    async with AsyncExitStack() as stack:
+        if args.url:
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=args.concurrency + 1)
+            )
+            base_url = args.url
+        else:
+            # One benchmark user would exhaust its rate limits at once
+            os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+            from app.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://benchmark"
+        client = await stack.enter_async_context(
+            httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60)
+        )
+
+        doctors = (await client.get("/doctors")).json()
+        ctx = Context(
+            patient_token=await _token(client, *PATIENT),
+            doctor_token=await _token(client, *DOCTOR),
+            doctor_ids=[doctor["id"] for doctor in doctors],
+            rng=random.Random(args.seed),
+        )
+
+        results = {}
+        print(f"{'scenario':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>15} {'p99 ms':>9}  errors")
+        for name in names:
+            scenario, expected = SCENARIOS[name]
+            row = await run_scenario(
+                client, ctx, scenario, expected, args.requests, args.concurrency, args.warmup
+            )
+            results[name] = row
+            base = baseline.get(name, {})
+            print(
+                f"{name:<16} {row['rps']:>9.1f} {row['p50_ms']:>9.1f} "
+                f"{row['p95_ms']:>9.1f}{_delta(row['p95_ms'], base.get('p95_ms')):>6} "
+                f"{row['p99_ms']:>9.1f}  {row['errors'] or '-'}"
+            )
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+        print(f"Saved results to {args.save}")
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end API latency benchmark")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests per scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write results as a baseline JSON file")
+    parser.add_argument("--baseline", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Booking contention soak test.
+
+Several client processes fire thousands of concurrent POST /appointments
+at a few hot doctor slots. Slots are 30 minutes apart while appointments
+last an hour, so neighbouring slots conflict as well as identical ones.
+Afterwards the database is checked for overlapping active appointments of
+the same doctor; any overlap fails the run (exit code 1).
+
+While the storm runs, pg_stat_activity is sampled for backends waiting on
+a lock. The report gives successful bookings per second, the 409 rate,
+client latency per outcome and the estimated total lock wait.
+
+Run against a multi-worker server and its (disposable) database. All
+appointments of the hot doctors on --day are deleted first. The storm
+comes from one patient, so turn off rate limiting on that server:
+
+    RATE_LIMIT_ENABLED=false gunicorn app.main:app -k uvicorn.workers.UvicornWorker --workers 4
+    python -m benchmarks.booking_soak --url http://localhost:8000 --attempts 5000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+
+import asyncpg
+import httpx
+
+from app.database import DATABASE_URL
+from app.models import APPOINTMENT_DURATION
+from benchmarks.concurrency import percentile
+
+LOCK_SAMPLE_INTERVAL = 0.05
+
+OVERLAPS_SQL = """
+SELECT a.doctor_id, a.id, a.start_time, b.id, b.start_time
+FROM appointments a
+JOIN appointments b
+  ON a.doctor_id = b.doctor_id AND a.id < b.id
+ AND a.start_time < b.start_time + $3::interval
+ AND b.start_time < a.start_time + $3::interval
+WHERE a.status = 'active' AND b.status = 'active'
+  AND a.doctor_id = ANY($1::int[]) AND a.start_time >= $2 AND a.start_time < $2 + interval '1 day'
+"""
+
+
+async def _client_process(
+    url: str, token: str, targets: list[tuple[int, str]], attempts: int, concurrency: int,
+    start_at: float, seed: int,
+) -> list[tuple[int, float]]:
+    rng = random.Random(seed)
+    results: list[tuple[int, float]] = []
+    remaining = iter(range(attempts))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=60) as client:
+
+        async def worker():
+            for _ in remaining:
+                doctor_id, start_time = rng.choice(targets)
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/appointments", json={"doctor_id": doctor_id, "start_time": start_time}
+                    )
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                results.append((status, time.perf_counter() - started))
+
+        # All processes start the storm at the same wall-clock moment
+        await asyncio.sleep(max(0.0, start_at - time.time()))
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def _run_client_process(*args) -> list[tuple[int, float]]:
+    return asyncio.run(_client_process(*args))
+
+
+async def _sample_lock_waits(conn: asyncpg.Connection, stop: asyncio.Event, samples: list[int]):
+    while not stop.is_set():
+        samples.append(
+            await conn.fetchval(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE wait_event_type = 'Lock' AND datname = current_database()"
+            )
+        )
+        try:
+            await asyncio.wait_for(stop.wait(), LOCK_SAMPLE_INTERVAL)
+        except TimeoutError:
+            pass
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    day = args.day
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        response = await client.post("/auth/login", json={"email": args.email, "password": args.password})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        doctor_ids = [doctor["id"] for doctor in (await client.get("/doctors")).json()][: args.doctors]
+
+    window = datetime(day.year, day.month, day.day)
+    opening = window.replace(hour=9)
+    targets = [
+        (doctor_id, (opening + timedelta(minutes=30 * slot)).isoformat() + "Z")
+        for doctor_id in doctor_ids
+        for slot in range(args.slots)
+    ]
+
+    conn = await asyncpg.connect(args.database_url.replace("postgresql+asyncpg://", "postgresql://"))
+    sampler = await asyncpg.connect(args.database_url.replace("postgresql+asyncpg://", "postgresql://"))
+    try:
+        await conn.execute(
+            "DELETE FROM appointments WHERE doctor_id = ANY($1::int[]) "
+            "AND start_time >= $2 AND start_time < $2 + interval '1 day'",
+            doctor_ids,
+            window,
+        )
+        print(
+            f"{args.attempts} bookings from {args.processes} processes x {args.concurrency} "
+            f"clients at {len(targets)} hot slots ({len(doctor_ids)} doctors, {day})"
+        )
+
+        per_process = [args.attempts // args.processes] * args.processes
+        per_process[0] += args.attempts - sum(per_process)
+        start_at = time.time() + 2
+        stop, lock_samples = asyncio.Event(), []
+        sampling = asyncio.create_task(_sample_lock_waits(sampler, stop, lock_samples))
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(args.processes, mp_context=get_context("spawn")) as pool:
+            futures = [
+                loop.run_in_executor(
+                    pool, _run_client_process, args.url, token, targets, attempts,
+                    args.concurrency, start_at, args.seed + i,
+                )
+                for i, attempts in enumerate(per_process)
+            ]
+            results = [row for rows in await asyncio.gather(*futures) for row in rows]
+        elapsed = time.time() - start_at
+        stop.set()
+        await sampling
+
+        overlaps = await conn.fetch(OVERLAPS_SQL, doctor_ids, window, APPOINTMENT_DURATION)
+        booked = await conn.fetchval(
+            "SELECT count(*) FROM appointments WHERE doctor_id = ANY($1::int[]) AND status = 'active' "
+            "AND start_time >= $2 AND start_time < $2 + interval '1 day'",
+            doctor_ids,
+            window,
+        )
+    finally:
+        await conn.close()
+        await sampler.close()
+
+    created = [latency for status, latency in results if status == 201]
+    conflicts = [latency for status, latency in results if status == 409]
+    failed = [status for status, _ in results if status not in (201, 409)]
+    lock_wait = sum(lock_samples) * LOCK_SAMPLE_INTERVAL
+
+    print(f"  bookings/s      {len(created) / elapsed:10.1f}   ({len(created)} created in {elapsed:.1f}s)")
+    print(f"  attempts/s      {len(results) / elapsed:10.1f}")
+    print(f"  409 rate        {len(conflicts) / len(results):10.1%}")
+    print(f"  other errors    {len(failed):10d}   {sorted(set(failed)) or ''}")
+    for label, latencies in (("201", created), ("409", conflicts)):
+        print(
+            f"  {label} latency     p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+            f"p95 {percentile(latencies, 95) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms"
+        )
+    print(
+        f"  lock waiters    peak {max(lock_samples, default=0)}, "
+        f"~{lock_wait:.2f}s total wait ({lock_wait / max(len(results), 1) * 1000:.2f} ms/attempt)"
+    )
+
+    ok = True
+    if overlaps:
+        ok = False
+        print(f"FAIL: {len(overlaps)} overlapping active appointment pairs")
+        for doctor_id, first_id, first_start, second_id, second_start in overlaps[:10]:
+            print(f"  doctor {doctor_id}: #{first_id} {first_start} overlaps #{second_id} {second_start}")
+    if booked != len(created):
+        ok = False
+        print(f"FAIL: {len(created)} bookings acknowledged but {booked} active rows stored")
+    if ok:
+        print("OK: no double-booking")
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Booking contention soak test")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--email", default="patient@hospital.com")
+    parser.add_argument("--password", default="Patient123!")
+    parser.add_argument("--attempts", type=int, default=5000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32, help="clients per process")
+    parser.add_argument("--doctors", type=int, default=2, help="number of hot doctors")
+    parser.add_argument("--slots", type=int, default=4, help="hot slots per doctor, 30 min apart")
+    parser.add_argument(
+        "--day", type=date.fromisoformat, default=date.today() + timedelta(days=400),
+        help="day of the hot slots (its appointments for the hot doctors are deleted)",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
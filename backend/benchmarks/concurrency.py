@@ -0,0 +1,134 @@
+"""
+Per-worker concurrency benchmark.
+
+Drives a single running API worker with an increasing number of concurrent
+clients hitting database-bound endpoints, while a side probe keeps calling
+/health. With a blocking database layer the probe latency climbs together
+with the load (the event loop is stuck inside the driver); with the async
+layer it stays flat and throughput scales with concurrency.
+
+Start one worker against a seeded database and run, for example:
+
+    uvicorn app.main:app --workers 1 --port 8000
+    python -m benchmarks.concurrency --url http://localhost:8000 --levels 1,8,32,64
+
+Run it on the commit before and after a change to compare the two tables.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_EMAIL = "patient@hospital.com"
+DEFAULT_PASSWORD = "Patient123!"
+
+
+async def _login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    paths: list[str],
+    deadline: float,
+    latencies: list[float],
+    errors: list[int],
+):
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError:
+            errors.append(0)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def _probe(client: httpx.AsyncClient, deadline: float, latencies: list[float]):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            await client.get("/health")
+        except httpx.HTTPError:
+            pass
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_level(url: str, token: str, paths: list[str], concurrency: int, duration: float) -> dict:
+    """Run one concurrency level and return its summary."""
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: list[float] = []
+    probe_latencies: list[float] = []
+    errors: list[int] = []
+
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(
+            _probe(client, deadline, probe_latencies),
+            *(_worker(client, paths, deadline, latencies, errors) for _ in range(concurrency)),
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "health_p50_ms": (statistics.median(probe_latencies) * 1000) if probe_latencies else 0.0,
+        "health_max_ms": (max(probe_latencies) * 1000) if probe_latencies else 0.0,
+    }
+
+
+async def main_async(args: argparse.Namespace):
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        token = await _login(client, args.email, args.password)
+
+    paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+    levels = [int(level) for level in args.levels.split(",")]
+
+    print(f"{'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'health p50':>11} {'health max':>11} {'errors':>7}")
+    for level in levels:
+        row = await run_level(args.url, token, paths, level, args.duration)
+        print(
+            f"{row['concurrency']:>5} {row['rps']:>9.1f} {row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+            f"{row['health_p50_ms']:>11.1f} {row['health_max_ms']:>11.1f} {row['errors']:>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker concurrency benchmark")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", default=DEFAULT_EMAIL)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--paths", default="/doctors,/appointments/my,/auth/me")
+    parser.add_argument("--levels", default="1,8,32,64")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
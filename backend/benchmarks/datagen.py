@@ -0,0 +1,308 @@
+"""
+Synthetic dataset generator.
+
+Fills the database with a production-sized hospital: doctors spread over
+departments with a realistic mix, patients with an age pyramid and common
+chronic conditions, and appointments on working days whose density varies
+per doctor (some are booked solid, most are not), with a share of them
+cancelled. Rows are streamed to Postgres with COPY, so millions of rows
+load in minutes. Everything is derived from --seed and --start, so the
+same command produces the same data.
+
+All generated accounts share one password (bcrypt is hashed once):
+doctors use Doctor123!, patients Patient123!. --truncate empties users and
+appointments and then puts back the startup seed accounts (ids 1..15,
+e.g. patient@hospital.com, sarah.chen@hospital.com), which the benchmarks
+log in with; bootstrap_state already marks the database as seeded, so
+the app would not recreate them. Cached principals are flushed too, since
+the old user ids are reused.
+
+    python -m benchmarks.datagen --patients 1000000 --doctors 2000 --days 90
+    python -m benchmarks.datagen --truncate --seed 7   # replace existing data
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+
+import asyncpg
+from redis.exceptions import RedisError
+
+from app.auth import hash_password
+from app.core.bootstrap import (
+    SEED_DOCTOR_PASSWORD,
+    SEED_DOCTORS,
+    SEED_PATIENT_PASSWORD,
+    SEED_PATIENTS,
+)
+from app.core.principal_cache import principal_cache
+from app.core.redis import get_redis
+from app.database import DATABASE_URL, create_db_and_tables
+from app.services import availability, doctor_roster, triage
+
+# Share of doctors per department
+DEPARTMENTS = {
+    "General Medicine": 0.22,
+    "Pediatrics": 0.12,
+    "Cardiology": 0.10,
+    "Orthopedics": 0.09,
+    "Obstetrics and Gynecology": 0.08,
+    "Dermatology": 0.07,
+    "Neurology": 0.06,
+    "Gastroenterology": 0.06,
+    "Ophthalmology": 0.06,
+    "Psychiatry": 0.05,
+    "Urology": 0.05,
+    "Oncology": 0.04,
+}
+# Share of patients reporting each condition (None: no history)
+CONDITIONS = {
+    None: 0.55,
+    "Hypertension": 0.12,
+    "Type 2 Diabetes": 0.08,
+    "Asthma": 0.06,
+    "High cholesterol": 0.06,
+    "Hypertension, Type 2 Diabetes": 0.04,
+    "Fever": 0.04,
+    "Severe Headache": 0.02,
+    "Shortness of breath": 0.015,
+    "Chest Pain": 0.01,
+    "Stroke": 0.005,
+}
+ALLERGIES = {None: 0.7, "Penicillin": 0.1, "Latex": 0.05, "Aspirin": 0.05, "Sulfa drugs": 0.05, "Pollen": 0.05}
+APPOINTMENT_TYPES = {"Consultation": 0.5, "Follow-up": 0.3, "Check-up": 0.15, "Procedure": 0.05}
+# Age pyramid buckets: (low, high, share)
+AGE_BUCKETS = [(0, 5, 0.06), (5, 18, 0.15), (18, 40, 0.30), (40, 65, 0.32), (65, 95, 0.17)]
+
+FIRST_NAMES = [
+    "Ahmet", "Mehmet", "Ayşe", "Fatma", "Elif", "Zeynep", "Mustafa", "Emre", "Can", "Deniz",
+    "John", "Jane", "Michael", "Sarah", "David", "Maria", "James", "Emily", "Robert", "Amara",
+    "Leila", "Aziz", "Marcus", "Selin", "Burak", "Ece", "Omar", "Lina", "Yusuf", "Nora",
+]
+LAST_NAMES = [
+    "Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Aydın", "Öztürk", "Arslan", "Doğan", "Kılıç",
+    "Smith", "Johnson", "Williams", "Brown", "Garcia", "Lee", "Chen", "Wilson", "Thompson", "Karim",
+]
+
+USER_COLUMNS = (
+    "id", "email", "password_hash", "role", "full_name", "phone", "age", "gender",
+    "department", "medical_history", "allergies",
+)
+APPOINTMENT_COLUMNS = ("doctor_id", "patient_id", "start_time", "status", "appointment_type", "notes")
+
+
+def _weighted(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _phone(rng: random.Random) -> str:
+    return f"(555) {rng.randrange(1000):03d}-{rng.randrange(10000):04d}"
+
+
+def _age(rng: random.Random) -> int:
+    low, high, _ = rng.choices(AGE_BUCKETS, weights=[share for *_, share in AGE_BUCKETS])[0]
+    return rng.randrange(low, high)
+
+
+def seed_rows(doctor_hash: str, patient_hash: str) -> Iterator[tuple]:
+    """users rows for the startup seed accounts, ids from 1"""
+    accounts = [(doctor, "doctor", doctor_hash) for doctor in SEED_DOCTORS]
+    accounts += [(patient, "patient", patient_hash) for patient in SEED_PATIENTS]
+    for user_id, (account, role, password_hash) in enumerate(accounts, 1):
+        values = {**account, "id": user_id, "role": role, "password_hash": password_hash}
+        yield tuple(values.get(column) for column in USER_COLUMNS)
+
+
+def doctor_rows(rng: random.Random, first_id: int, count: int, password_hash: str) -> Iterator[tuple]:
+    """users rows for doctors, ids first_id .. first_id + count - 1"""
+    for user_id in range(first_id, first_id + count):
+        yield (
+            user_id,
+            f"doctor{user_id}@hospital.com",
+            password_hash,
+            "doctor",
+            f"Dr. {_name(rng)}",
+            _phone(rng),
+            rng.randrange(29, 68),
+            rng.choice(("Female", "Male")),
+            _weighted(rng, DEPARTMENTS),
+            None,
+            None,
+        )
+
+
+def patient_rows(rng: random.Random, first_id: int, count: int, password_hash: str) -> Iterator[tuple]:
+    """users rows for patients, ids first_id .. first_id + count - 1"""
+    for user_id in range(first_id, first_id + count):
+        yield (
+            user_id,
+            f"patient{user_id}@example.com",
+            password_hash,
+            "patient",
+            _name(rng),
+            _phone(rng),
+            _age(rng),
+            rng.choice(("Female", "Male")),
+            None,
+            _weighted(rng, CONDITIONS),
+            _weighted(rng, ALLERGIES),
+        )
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Knuth; means here are small (appointments per doctor-day)
+    threshold, k, p = math.exp(-mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= threshold:
+            return k
+        k += 1
+
+
+def appointment_rows(
+    rng: random.Random,
+    doctor_ids: range,
+    patient_ids: range,
+    start: date,
+    days: int,
+    density: float,
+    cancel_rate: float,
+) -> Iterator[tuple]:
+    """
+    appointments rows on working days, in hourly slots within working hours.
+    Each doctor's load is density scaled by a log-normal popularity, and
+    patients are skewed so some visit often and many rarely.
+    """
+    slots_per_day = availability.DAY_END_HOUR - availability.DAY_START_HOUR
+    popularity = {doctor_id: rng.lognormvariate(0, 0.5) for doctor_id in doctor_ids}
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        opening = datetime.combine(day, dt_time(availability.DAY_START_HOUR))
+        for doctor_id in doctor_ids:
+            booked = min(slots_per_day, _poisson(rng, density * popularity[doctor_id]))
+            # Distinct hourly slots: active appointments never overlap
+            for slot in sorted(rng.sample(range(slots_per_day), booked)):
+                yield (
+                    doctor_id,
+                    patient_ids[int(len(patient_ids) * rng.random() ** 2)],
+                    opening + timedelta(hours=slot),
+                    "cancelled" if rng.random() < cancel_rate else "active",
+                    _weighted(rng, APPOINTMENT_TYPES),
+                    None,
+                )
+
+
+class _Progress:
+    """Counts rows as COPY consumes them and reports the rate."""
+
+    def __init__(self, label: str, rows: Iterator[tuple], every: int = 100_000):
+        self.label, self.rows, self.every = label, rows, every
+        self.count = 0
+        self.started = time.perf_counter()
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            if self.count % self.every == 0:
+                self.report()
+            yield row
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.count / elapsed if elapsed else 0.0
+        print(f"  {self.label}: {self.count:,} rows, {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+
+async def _copy(conn: asyncpg.Connection, table: str, columns: tuple, label: str, rows: Iterator[tuple]):
+    progress = _Progress(label, rows)
+    await conn.copy_records_to_table(table, records=progress, columns=list(columns))
+    progress.report()
+
+
+async def generate(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    await create_db_and_tables()
+
+    conn = await asyncpg.connect(args.database_url.replace("postgresql+asyncpg://", "postgresql://"))
+    try:
+        async with conn.transaction():
+            doctor_hash = hash_password(SEED_DOCTOR_PASSWORD)
+            patient_hash = hash_password(SEED_PATIENT_PASSWORD)
+            if args.truncate:
+                await conn.execute("TRUNCATE appointments, users RESTART IDENTITY CASCADE")
+                await _copy(conn, "users", USER_COLUMNS, "seed accounts", seed_rows(doctor_hash, patient_hash))
+            first_id = (await conn.fetchval("SELECT coalesce(max(id), 0) FROM users")) + 1
+            doctor_ids = range(first_id, first_id + args.doctors)
+            patient_ids = range(doctor_ids.stop, doctor_ids.stop + args.patients)
+
+            print(f"Generating {args.doctors:,} doctors, {args.patients:,} patients, {args.days} days")
+            await _copy(conn, "users", USER_COLUMNS, "doctors",
+                        doctor_rows(rng, doctor_ids.start, args.doctors, doctor_hash))
+            await _copy(conn, "users", USER_COLUMNS, "patients",
+                        patient_rows(rng, patient_ids.start, args.patients, patient_hash))
+            await _copy(
+                conn,
+                "appointments",
+                APPOINTMENT_COLUMNS,
+                "appointments",
+                appointment_rows(
+                    rng, doctor_ids, patient_ids, args.start, args.days, args.density, args.cancel_rate
+                ),
+            )
+            # Explicit ids bypassed the sequence
+            await conn.execute("SELECT setval(pg_get_serial_sequence('users', 'id'), max(id)) FROM users")
+
+        print("Analyzing")
+        await conn.execute("ANALYZE users")
+        await conn.execute("ANALYZE appointments")
+    finally:
+        await conn.close()
+
+    # Rows bypassed the API: drop what Redis derived from the old data
+    redis = get_redis()
+    await triage.reset(redis)
+    await doctor_roster.bump_version(redis)
+    if args.truncate:
+        # Ids were reused: tokens of the old users must not resolve to cached principals
+        await principal_cache.invalidate_all(redis)
+    try:
+        async for key in redis.scan_iter(match="availability:*", count=1000):
+            await redis.delete(key)
+    except RedisError as e:
+        print(f"Redis availability cache not cleared: {e}")
+    await redis.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the database with a synthetic hospital")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--doctors", type=int, default=2_000)
+    parser.add_argument("--patients", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=90, help="days of appointments to generate")
+    parser.add_argument(
+        "--start", type=date.fromisoformat, default=date.today() - timedelta(days=30),
+        help="first appointment day (default: 30 days ago)",
+    )
+    parser.add_argument("--density", type=float, default=5.0, help="mean appointments per doctor-day")
+    parser.add_argument("--cancel-rate", type=float, default=0.08)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--truncate", action="store_true",
+        help="delete existing users and appointments, keeping only the seed accounts (re-inserted)",
+    )
+    asyncio.run(generate(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
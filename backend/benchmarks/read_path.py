@@ -0,0 +1,165 @@
+"""
+ORM vs Core read path microbenchmark.
+
+Loads the same lists both ways and reports client-side CPU time and
+allocated memory per row:
+
+- orm:  select(User/Appointment) ORM instances (selectinload for the nested
+        users), validated into UserRead/AppointmentRead and rendered the way
+        FastAPI renders a response_model;
+- core: explicit-column Core selects serialized by orjson (app/core/rows.py),
+        which is what the routes run.
+
+CPU is process time, so it includes row decoding but not the wait for
+Postgres. Allocations are the tracemalloc peak of a separate run. Both
+paths must produce the same JSON document. Run against a seeded database:
+
+    python -m benchmarks.datagen --doctors 200 --patients 20000 --truncate
+    python -m benchmarks.read_path --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.appointment_routes import _my_appointments_statement
+from app.core.fields import USER_FIELDS, user_columns
+from app.core.rows import appointments_with_users, as_dicts, json_response
+from app.database import engine
+from app.models import Appointment, AppointmentRead, User, UserRead, UserRole
+
+Path = Callable[[AsyncSession], Awaitable[bytes]]
+
+
+def _fastapi_render(adapter: TypeAdapter, objects: list) -> bytes:
+    # serialize_response: validate into the response model, dump in JSON
+    # mode, then JSONResponse.render
+    content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def _core_render(payload: list) -> bytes:
+    return json_response(payload, Response()).body
+
+
+_USERS = TypeAdapter(list[UserRead])
+_APPOINTMENTS = TypeAdapter(list[AppointmentRead])
+
+
+def _user_paths(role: UserRole, limit: int) -> tuple[Path, Path]:
+    async def orm(session: AsyncSession) -> bytes:
+        statement = select(User).where(User.role == role).order_by(User.id).limit(limit)
+        return _fastapi_render(_USERS, (await session.exec(statement)).all())
+
+    async def core(session: AsyncSession) -> bytes:
+        statement = select(*user_columns()).where(User.role == role).order_by(User.id).limit(limit)
+        return _core_render(as_dicts((await session.exec(statement)).all(), USER_FIELDS))
+
+    return orm, core
+
+
+def _appointment_paths(doctor: UserRead, limit: int) -> tuple[Path, Path]:
+    async def orm(session: AsyncSession) -> bytes:
+        statement = select(Appointment).where(Appointment.doctor_id == doctor.id)
+        statement = statement.order_by(Appointment.start_time, Appointment.id).limit(limit)
+        statement = statement.options(selectinload(Appointment.doctor), selectinload(Appointment.patient))
+        return _fastapi_render(_APPOINTMENTS, (await session.exec(statement)).all())
+
+    async def core(session: AsyncSession) -> bytes:
+        statement = _my_appointments_statement(doctor, None, None, None, None).limit(limit)
+        rows = (await session.exec(statement)).all()
+        return _core_render(await appointments_with_users(session, rows))
+
+    return orm, core
+
+
+async def _run(path: Path) -> bytes:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        return await path(session)
+
+
+async def _cpu_per_run(path: Path, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        await _run(path)
+    return (time.process_time() - started) / repeat
+
+
+async def _peak_bytes(path: Path) -> int:
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await _run(path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+async def main_async(args: argparse.Namespace):
+    async with AsyncSession(engine) as session:
+        doctor_id = (
+            await session.exec(
+                select(Appointment.doctor_id)
+                .group_by(Appointment.doctor_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            )
+        ).first()
+        doctor = UserRead.model_validate(await session.get(User, doctor_id)) if doctor_id else None
+
+    scenarios = {
+        "doctors": _user_paths(UserRole.doctor, args.doctors),
+        "waiting_list": _user_paths(UserRole.patient, args.patients),
+    }
+    if doctor is not None:
+        scenarios["appointments_my"] = _appointment_paths(doctor, args.appointments)
+
+    print(
+        f"{'scenario':<16} {'rows':>6} {'orm us/row':>11} {'core us/row':>12} {'speedup':>8} "
+        f"{'orm B/row':>10} {'core B/row':>11}"
+    )
+    for name, (orm, core) in scenarios.items():
+        # Warm up both paths (statement caches, pydantic validators) and
+        # check that they render the same document
+        orm_body, core_body = await _run(orm), await _run(core)
+        rows = len(json.loads(core_body))
+        if json.loads(orm_body) != json.loads(core_body):
+            print(f"{name}: WARNING the ORM and Core paths return different documents")
+        if not rows:
+            print(f"{name:<16} {0:>6}  (no rows; seed the database first)")
+            continue
+
+        orm_cpu = await _cpu_per_run(orm, args.repeat)
+        core_cpu = await _cpu_per_run(core, args.repeat)
+        orm_peak, core_peak = await _peak_bytes(orm), await _peak_bytes(core)
+        print(
+            f"{name:<16} {rows:>6} {orm_cpu / rows * 1e6:>11.1f} {core_cpu / rows * 1e6:>12.1f} "
+            f"{orm_cpu / core_cpu if core_cpu else 0:>7.1f}x "
+            f"{orm_peak / rows:>10.0f} {core_peak / rows:>11.0f}"
+        )
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ORM vs Core read path microbenchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per path")
+    parser.add_argument("--doctors", type=int, default=200, help="rows in the doctors list")
+    parser.add_argument("--patients", type=int, default=500, help="rows in the waiting list page")
+    parser.add_argument("--appointments", type=int, default=200, help="rows in the appointments page")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
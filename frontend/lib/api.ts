@@ -112,6 +112,14 @@ class ApiClient {
     return this.get("/doctors");
   }
 
+  async getDoctorAvailability(doctorId: number, from?: string, to?: string) {
+    const params = new URLSearchParams();
+    if (from) params.set("from", from);
+    if (to) params.set("to", to);
+    const query = params.toString();
+    return this.get(`/doctors/${doctorId}/availability${query ? `?${query}` : ""}`);
+  }
+
   // Appointment methods
   async getMyAppointments() {
     return this.get("/appointments/my");
@@ -121,6 +129,10 @@ class ApiClient {
     return this.post("/appointments", data);
   }
 
+  async cancelAppointment(appointmentId: number) {
+    return this.request(`/appointments/${appointmentId}/cancel`, { method: "PATCH" });
+  }
+
   // Patient methods
   async getWaitingList() {
     return this.get("/patients/waiting-list");